@@ -1,15 +1,16 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, RedirectResponse
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import json
 import os
 from dotenv import load_dotenv
 import asyncio
+from contextlib import AsyncExitStack
 from datetime import datetime
 from pathlib import Path
-import tempfile
 
 from services.transcription import TranscriptionService
 from services.reasoning import ReasoningService
@@ -19,8 +20,20 @@ from services.gemini_service import GeminiService
 from services.coaching_service import CoachingService
 from services.vibe_service import VibeService
 from services.interactive_coaching_service import InteractiveCoachingService
-from services.video_service import VideoProcessor, VideoAnalysisAggregator
+from services.video_service import VideoProcessor, VideoAnalysisAggregator, FRAME_PROFILES
 from services.vision_analyzers import HybridVisionAnalyzer
+from services.frame_dedup import FrameDeduplicator
+from services.frame_selection import FrameSelectionPlanner
+from services.clients import close_clients
+from services.cache import JsonDiskCache, make_cache_key
+from services.stream_manager import StreamTranscriptionManager
+from services.timeline import TranscriptTimeline
+from services.process_runner import get_process_runner
+from services.upload_spool import UploadSpooler, UploadTooLarge
+from services.ingest_pipeline import PipelinedIngest, STREAMABLE_CONTENT_TYPES
+from services.temp_storage import TempStorageManager, StorageQuotaExceeded
+from services.media_probe import MediaProber, MediaProbeError
+from services.frame_preprocessing import FramePreprocessor
 
 load_dotenv()
 
@@ -41,7 +54,14 @@ app.add_middleware(
 )
 
 # Services
-transcription_service = TranscriptionService(api_key=os.getenv("OPENAI_API_KEY"))
+transcription_service = TranscriptionService(
+    api_key=os.getenv("OPENAI_API_KEY"),
+    max_chunk_concurrency=int(os.getenv("WHISPER_MAX_CONCURRENCY", "6")),
+    cache=JsonDiskCache(
+        os.getenv("TRANSCRIPT_CACHE_DIR", "/tmp/eve_cache/transcripts"),
+        max_disk_bytes=int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "256")) * 1024 * 1024
+    )
+)
 reasoning_service = ReasoningService(
     openai_key=os.getenv("OPENAI_API_KEY")
 )
@@ -54,12 +74,86 @@ gemini_service = GeminiService(api_key=os.getenv("GEMINI_API_KEY"))
 coaching_service = CoachingService(openai_key=os.getenv("OPENAI_API_KEY"))
 vibe_service = VibeService()
 interactive_coaching_service = InteractiveCoachingService(openai_key=os.getenv("OPENAI_API_KEY"))
-video_processor = VideoProcessor()
+# Stream metadata is cached by content hash, so a re-uploaded recording is never probed twice
+media_prober = MediaProber(cache=JsonDiskCache(
+    os.getenv("PROBE_CACHE_DIR", "/tmp/eve_cache/probes"),
+    max_disk_bytes=16 * 1024 * 1024
+))
+video_processor = VideoProcessor(prober=media_prober)
+frame_deduplicator = FrameDeduplicator(max_distance=int(os.getenv("FRAME_DEDUP_MAX_DISTANCE", "6")))
+frame_planner = FrameSelectionPlanner()
+# "seek" (evenly spaced targets, the single-pass default), "scene" (seek to the most
+# informative moments; costs one or two extra decode passes to score them first),
+# "keyframes" (I-frames only) or "fps" (decode everything)
+FRAME_EXTRACTION_MODE = os.getenv("FRAME_EXTRACTION_MODE", "seek").lower()
+# memory: frames come back as JPEG bytes over an ffmpeg pipe; disk: frame files in the session dir
+FRAMES_IN_MEMORY = os.getenv("FRAME_STORAGE", "memory").lower() != "disk"
+# Largest upload accepted for video, on /transcribe/file and /transcribe/stream-upload
+MAX_VIDEO_UPLOAD_BYTES = 200 * 1024 * 1024
+UPLOAD_PROCESSING_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_PROCESSING_TIMEOUT_SECONDS", "900"))
+# Bump when the video pipeline's output changes so cached analyses are recomputed
+VIDEO_PIPELINE_VERSION = 1
+# Finished video analyses keyed by content hash + options: a repeat upload is a disk read
+video_result_cache = JsonDiskCache(
+    os.getenv("VIDEO_RESULT_CACHE_DIR", "/tmp/eve_cache/video_results"),
+    max_disk_bytes=int(os.getenv("VIDEO_RESULT_CACHE_MAX_MB", "256")) * 1024 * 1024,
+    max_memory_entries=64,
+    ttl_seconds=float(os.getenv("VIDEO_RESULT_CACHE_TTL_HOURS", "168")) * 3600
+)
+# Pipelined uploads (/transcribe/stream-upload): audio segment length, frame sampling and budget
+PIPELINE_SEGMENT_SECONDS = float(os.getenv("PIPELINE_SEGMENT_SECONDS", "60"))
+PIPELINE_FRAME_INTERVAL_SECONDS = float(os.getenv("PIPELINE_FRAME_INTERVAL_SECONDS", "10"))
+PIPELINE_MAX_FRAMES = int(os.getenv("PIPELINE_MAX_FRAMES", "15"))
+upload_spooler = UploadSpooler(
+    max_inflight_bytes=int(os.getenv("UPLOAD_MAX_INFLIGHT_MB", "512")) * 1024 * 1024,
+    temp_dir=video_processor.temp_dir
+)
+# Everything under the video temp dir (uploads, audio, frames, chunks) counts against one quota
+temp_storage = TempStorageManager(
+    root=video_processor.temp_dir,
+    quota_bytes=int(os.getenv("TEMP_STORAGE_QUOTA_MB", "4096")) * 1024 * 1024,
+    policy=os.getenv("TEMP_STORAGE_POLICY", "queue").lower(),
+    queue_timeout_seconds=float(os.getenv("TEMP_STORAGE_QUEUE_TIMEOUT_SECONDS", "60")),
+    max_age_seconds=float(os.getenv("TEMP_STORAGE_MAX_AGE_SECONDS", "3600"))
+)
+# A video session holds the upload plus its extracted audio (and frames in disk mode)
+VIDEO_DISK_FACTOR = 2
 vision_analyzer = HybridVisionAnalyzer(
     openai_key=os.getenv("OPENAI_API_KEY"),
-    gemini_key=os.getenv("GEMINI_API_KEY")
+    gemini_key=os.getenv("GEMINI_API_KEY"),
+    max_concurrent_batches=int(os.getenv("VISION_MAX_CONCURRENT_BATCHES", "4"))
 )
 video_aggregator = VideoAnalysisAggregator()
+# Frame resize/encode/base64 runs on a process pool; videos beyond the cap wait for a slot
+frame_preprocessor = FramePreprocessor(
+    max_workers=int(os.getenv("FRAME_PREPROCESS_WORKERS") or os.cpu_count() or 2),
+    max_concurrent_videos=int(os.getenv("MAX_CONCURRENT_VIDEOS", "4"))
+)
+stream_manager = StreamTranscriptionManager(
+    transcription_service.transcribe_window,
+    max_sessions=int(os.getenv("STREAM_MAX_SESSIONS", "100")),
+    idle_timeout_seconds=float(os.getenv("STREAM_IDLE_TIMEOUT_SECONDS", "60"))
+)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start the janitors and warm the frame preprocessing pool"""
+    app.state.stream_janitor = asyncio.create_task(stream_manager.run_janitor())
+    app.state.temp_janitor = asyncio.create_task(temp_storage.run_janitor())
+    # Spawning the workers takes seconds; pay for it here, not in the first video request
+    try:
+        await frame_preprocessor.warm_up()
+    except Exception as e:
+        print(f"⚠️ Could not warm up frame preprocessing pool: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    """Stop live sessions and close the shared provider connection pool"""
+    app.state.stream_janitor.cancel()
+    app.state.temp_janitor.cancel()
+    await stream_manager.close_all()
+    await close_clients()
+    frame_preprocessor.shutdown()
 
 # Models
 class TranscriptRequest(BaseModel):
@@ -108,17 +202,16 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    import subprocess
-    
     # Check ffmpeg
     ffmpeg_installed = False
     ffmpeg_version = "Not installed"
     try:
-        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, timeout=2)
+        result = await get_process_runner().run(["ffmpeg", "-version"], timeout=2)
         if result.returncode == 0:
             ffmpeg_installed = True
-            ffmpeg_version = result.stdout.split('\n')[0].split('version')[1].split()[0] if 'version' in result.stdout else "installed"
-    except:
+            stdout = result.stdout.decode("utf-8", errors="replace")
+            ffmpeg_version = stdout.split('\n')[0].split('version')[1].split()[0] if 'version' in stdout else "installed"
+    except Exception:
         pass
     
     openai_configured = bool(os.getenv("OPENAI_API_KEY")) and os.getenv("OPENAI_API_KEY") != "your_openai_api_key_here"
@@ -155,8 +248,86 @@ async def health_check():
         ]
     }
 
+async def analyze_video_vibe(transcript: str) -> Dict[str, Any]:
+    """Amazon Bedrock vibe analysis of a video transcript, with setup errors explained"""
+    print("🎭 Running Amazon Bedrock emotional analysis...")
+    try:
+        vibe_result = await vibe_service.analyze_vibe(transcript, context="video")
+
+        # Check if it's an error response
+        if vibe_result.get('vibe') == 'Error':
+            error_msg = vibe_result.get('evidence', ['Unknown error'])[0]
+            if 'Model use case details' in error_msg or 'AccessDenied' in error_msg:
+                return {
+                    "vibe": "Bedrock access not enabled",
+                    "confidence": 0,
+                    "note": "AWS Bedrock requires account setup. Visit AWS Console to enable Claude model access.",
+                    "error_type": "access_denied"
+                }
+            else:
+                return {
+                    "vibe": "Bedrock error", 
+                    "confidence": 0, 
+                    "note": error_msg,
+                    "error_type": "configuration_error"
+                }
+        elif vibe_result.get('vibe') == 'Not configured':
+            return {
+                "vibe": "Bedrock not configured",
+                "confidence": 0,
+                "note": "AWS credentials not found in .env file. Add AWS_ACCESS_KEY_ID or AWS_BEARER_TOKEN_BEDROCK",
+                "error_type": "not_configured"
+            }
+        else:
+            # Successfully got vibe analysis
+            print(f"✅ Amazon Bedrock analysis complete: {vibe_result.get('vibe', 'N/A')} (confidence: {vibe_result.get('confidence', 0):.2f})")
+            return vibe_result
+    except Exception as e:
+        print(f"⚠️ Bedrock vibe analysis failed: {e}")
+        return {
+            "vibe": "Bedrock unavailable", 
+            "confidence": 0, 
+            "note": f"Error: {str(e)}",
+            "error_type": "system_error"
+        }
+
+async def analyze_frames(frames: List[Dict[str, Any]], vision_mode: str) -> List[Dict[str, Any]]:
+    """Prepare frame payloads on the preprocessing pool, then run GPT-4o Vision on them"""
+    profile = FRAME_PROFILES.get(vision_mode, FRAME_PROFILES["balanced"])
+    prepared = await frame_preprocessor.prepare(frames, profile["max_dimension"], profile["quality"])
+    return await vision_analyzer.analyze_video_frames(prepared, mode="detailed")
+
+async def run_until_disconnected(request: Request, coro, timeout: float, poll_interval: float = 1.0):
+    """
+    Await coro, cancelling it if the client disconnects or the deadline passes
+    
+    Cancellation propagates into the ffmpeg process runner, which kills the running
+    decoder, so abandoned uploads stop consuming CPU.
+    """
+    task = asyncio.create_task(coro)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print("🔌 Client disconnected - cancelling processing")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+            if loop.time() > deadline:
+                task.cancel()
+                raise HTTPException(status_code=504, detail=f"Processing exceeded {timeout:.0f}s")
+    finally:
+        if not task.done():
+            task.cancel()
+        # Let the task run its cleanup (temp files, killed processes) before returning
+        await asyncio.gather(task, return_exceptions=True)
+
 @app.post("/transcribe/file")
 async def transcribe_audio_file(
+    request: Request,
     file: UploadFile = File(...), 
     validate: bool = True,
     analyze_video: bool = False,
@@ -171,8 +342,15 @@ async def transcribe_audio_file(
         analyze_video: If video, whether to run visual analysis
         vision_mode: "fast" (Gemini only), "balanced" (hybrid), "detailed" (GPT-4o only)
     """
-    temp_files = []  # Track files to cleanup
-    session_id = None
+    return await run_until_disconnected(
+        request,
+        process_uploaded_file(file, validate, analyze_video, vision_mode),
+        timeout=UPLOAD_PROCESSING_TIMEOUT_SECONDS
+    )
+
+async def process_uploaded_file(file: UploadFile, validate: bool, analyze_video: bool, vision_mode: str):
+    storage = None  # Temp files of this request, deleted when it is released
+    slots = AsyncExitStack()  # Concurrent-video slot, held while a video is processed
     
     try:
         filename = file.filename or "media.mp3"
@@ -180,7 +358,7 @@ async def transcribe_audio_file(
         print(f"Received file: {filename}, content_type: {file.content_type}, size: {file_size_mb:.2f}MB")
         
         # Check file size (200MB limit for videos, 100MB for audio)
-        max_size = 200 * 1024 * 1024  # 200MB for videos
+        max_size = MAX_VIDEO_UPLOAD_BYTES
         if file.size and file.size > max_size:
             raise HTTPException(
                 status_code=413,
@@ -215,35 +393,43 @@ async def transcribe_audio_file(
             if not os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY") == "your_gemini_api_key_here":
                 print("⚠️ Warning: Gemini API key not configured. Using OpenAI only (slower).")
             
-            # Save uploaded file temporarily
+            await slots.enter_async_context(frame_preprocessor.video_slot())
+            
+            # Copy the upload to disk in chunks (never the whole video in memory)
             print("💾 Saving uploaded video to temporary file...")
-            temp_video = tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename).suffix)
-            file_content = await file.read()
-            print(f"📁 Read {len(file_content)} bytes from upload")
-            temp_video.write(file_content)
-            temp_video.flush()
-            temp_video_path = temp_video.name
-            temp_files.append(temp_video_path)
-            print(f"💾 Saved to: {temp_video_path}")
+            storage = await temp_storage.acquire(expected_bytes=(file.size or max_size) * VIDEO_DISK_FACTOR)
+            temp_video_path = storage.track(await upload_spooler.spool(file, suffix=Path(filename).suffix, max_bytes=max_size))
             
-            # 1. Extract audio from video
-            print("📻 Extracting audio from video...")
-            audio_path = video_processor.extract_audio(temp_video_path)
-            temp_files.append(audio_path)
+            # 1. Probe streams once (duration, codecs, resolution) to route the rest
+            media_info = await video_processor.probe_media(temp_video_path)
+            video_duration = media_info.duration
             
-            # 2. Transcribe audio
-            print("🎤 Transcribing audio with Whisper...")
-            with open(audio_path, 'rb') as audio_file:
-                transcript = await transcription_service.transcribe_file_obj(audio_file, "extracted_audio.wav")
+            result_key = make_cache_key(
+                "video-analysis", media_info.content_hash, vision_mode, validate,
+                FRAME_EXTRACTION_MODE, VIDEO_PIPELINE_VERSION
+            )
+            cached = await video_result_cache.get_async(result_key)
+            if cached:
+                print(f"⚡ Cached analysis found for {filename} - skipping extraction, transcription and vision")
+                return {**cached, "cached": True}
             
-            if validate:
-                transcript = await transcription_service.validate_and_enhance_transcript(transcript)
+            if not media_info.has_video:
+                # e.g. a voice memo in a .webm container - there are no frames to analyze
+                print("🎧 No video stream found - transcribing as audio only")
+                transcription = await transcription_service.transcribe_path(temp_video_path, filename, duration=media_info.duration)
+                transcript = transcription["text"]
+                if validate and transcript:
+                    transcript = await transcription_service.validate_and_enhance_transcript(transcript)
+                return {
+                    "transcript": transcript,
+                    "transcript_chunks": transcription["chunks"],
+                    "timeline": transcription["timeline"].to_dict(),
+                    "is_video": False,
+                    "status": "success",
+                    "validated": validate
+                }
             
-            # 3. Extract frames from video (OPTIMIZED MODE - smart sampling)
-            print(f"🎞️ Extracting frames (mode: {vision_mode})...")
             # OPTIMIZED: Smart frame sampling based on video length
-            video_duration = video_processor.get_video_duration(temp_video_path)
-            
             if video_duration <= 30:  # Short videos: more frames
                 max_frames = 15
                 fps = max(0.5, max_frames / max(video_duration, 1))
@@ -254,17 +440,51 @@ async def transcribe_audio_file(
                 max_frames = 10
                 fps = max(0.05, max_frames / max(video_duration, 1))
             
-            # Use higher resolution for better analysis quality
-            frames = video_processor.extract_frames(temp_video_path, fps=fps, max_dimension=512)
+            # 2. Extract audio and frames in a single ffmpeg run
+            extraction_mode = FRAME_EXTRACTION_MODE
+            if video_duration <= 0 and extraction_mode in ("seek", "scene"):
+                # Targets cannot be planned without a duration: take keyframes across the
+                # whole file instead (thinned to max_frames below)
+                print("⚠️ Video duration unknown - sampling keyframes instead of seeking")
+                extraction_mode = "keyframes"
+            print(f"📻🎞️ Extracting audio and frames (mode: {vision_mode}, frames: {extraction_mode})...")
+            if extraction_mode == "fps":
+                media = await video_processor.extract_media(temp_video_path, fps=fps, frame_profile=vision_mode, media_info=media_info, in_memory=FRAMES_IN_MEMORY)
+            elif extraction_mode == "keyframes":
+                media = await video_processor.extract_media(temp_video_path, keyframes=True, max_frames=max_frames, frame_profile=vision_mode, media_info=media_info, in_memory=FRAMES_IN_MEMORY)
+            else:
+                timestamps = None
+                if extraction_mode == "scene":
+                    timestamps = await frame_planner.plan(temp_video_path, video_duration, max_frames, media_info.start_time)
+                if not timestamps:
+                    timestamps = video_processor.plan_timestamps(video_duration, max_frames)
+                media = await video_processor.extract_media(temp_video_path, timestamps=timestamps, frame_profile=vision_mode, media_info=media_info, in_memory=FRAMES_IN_MEMORY)
+            storage.track(os.path.join(video_processor.temp_dir, media["session_id"]))
+            audio_path = media["audio_path"]
+            frames = media["frames"]
+            if audio_path:
+                storage.track(audio_path)
+            
+            # 3. Transcribe audio (long recordings are split at silences and transcribed in parallel)
+            if audio_path:
+                print("🎤 Transcribing audio with Whisper...")
+                transcription = await transcription_service.transcribe_path(audio_path)
+            else:
+                print("🔇 Video has no audio track - skipping transcription")
+                transcription = {"text": "", "chunks": [], "timeline": TranscriptTimeline()}
+            transcript = transcription["text"]
+            transcript_chunks = transcription["chunks"]
+            # Word timings refer to the raw Whisper text, before validation
+            timeline = transcription["timeline"]
             
-            # Limit to max_frames if we got too many
+            if validate and transcript:
+                transcript = await transcription_service.validate_and_enhance_transcript(transcript)
+            
+            # Limit to max_frames if we got too many (evenly spaced, so results are reproducible)
             if len(frames) > max_frames:
-                import random
-                frames = random.sample(frames, max_frames)
-                frames.sort(key=lambda x: x['timestamp'])
+                frames = [frames[i * len(frames) // max_frames] for i in range(max_frames)]
             
             print(f"🎯 Selected {len(frames)} key frames for analysis (duration: {video_duration:.1f}s)")
-            session_id = frames[0]["session_id"] if frames else None
             
             # 4. Analyze frames with GPT-4o Vision in BATCHES (fast but quality)
             print(f"👁️ Analyzing {len(frames)} frames with GPT-4o Vision (batched)...")
@@ -282,7 +502,10 @@ async def transcribe_audio_file(
                 }
             
             try:
-                frame_results = await vision_analyzer.analyze_video_frames(frames, mode="detailed")
+                # Near-identical frames (same slide, static screen) are analyzed once
+                unique_frames, duplicate_frames = frame_deduplicator.deduplicate(frames)
+                frame_results = await analyze_frames(unique_frames, vision_mode)
+                frame_results = frame_deduplicator.expand_results(frame_results, frames, duplicate_frames)
                 print(f"🔍 Vision analysis returned {len(frame_results)} results")
                 
                 # Filter out any error frames
@@ -299,6 +522,8 @@ async def transcribe_audio_file(
                         "is_video": True,
                         "status": "success"
                     }
+                # Frames that failed (or got no result) make this analysis partial
+                vision_complete = {f["frame_number"] for f in valid_frames} >= {f["number"] for f in frames}
                 frame_results = valid_frames
             except Exception as e:
                 print(f"❌ Vision analysis failed: {e}")
@@ -315,57 +540,18 @@ async def transcribe_audio_file(
         
             # 5. Quick aggregation + vibe check with Amazon Bedrock
             print("📊 Aggregating results...")
-            video_summary = video_aggregator.aggregate_frame_results(frame_results, transcript)
+            video_summary = video_aggregator.aggregate_frame_results(frame_results, transcript, video_duration=video_duration)
             
             # ALWAYS add Amazon Bedrock vibe analysis for videos - this is a key feature
-            print("🎭 Running Amazon Bedrock emotional analysis...")
-            try:
-                from services.vibe_service import VibeService
-                vibe_service_bedrock = VibeService()
-                vibe_result = await vibe_service_bedrock.analyze_vibe(transcript, context="video")
-                
-                # Check if it's an error response
-                if vibe_result.get('vibe') == 'Error':
-                    error_msg = vibe_result.get('evidence', ['Unknown error'])[0]
-                    if 'Model use case details' in error_msg or 'AccessDenied' in error_msg:
-                        video_summary['bedrock_vibe_analysis'] = {
-                            "vibe": "Bedrock access not enabled",
-                            "confidence": 0,
-                            "note": "AWS Bedrock requires account setup. Visit AWS Console to enable Claude model access.",
-                            "error_type": "access_denied"
-                        }
-                    else:
-                        video_summary['bedrock_vibe_analysis'] = {
-                            "vibe": "Bedrock error", 
-                            "confidence": 0, 
-                            "note": error_msg,
-                            "error_type": "configuration_error"
-                        }
-                elif vibe_result.get('vibe') == 'Not configured':
-                    video_summary['bedrock_vibe_analysis'] = {
-                        "vibe": "Bedrock not configured",
-                        "confidence": 0,
-                        "note": "AWS credentials not found in .env file. Add AWS_ACCESS_KEY_ID or AWS_BEARER_TOKEN_BEDROCK",
-                        "error_type": "not_configured"
-                    }
-                else:
-                    # Successfully got vibe analysis
-                    video_summary['bedrock_vibe_analysis'] = vibe_result
-                    print(f"✅ Amazon Bedrock analysis complete: {vibe_result.get('vibe', 'N/A')} (confidence: {vibe_result.get('confidence', 0):.2f})")
-            except Exception as e:
-                print(f"⚠️ Bedrock vibe analysis failed: {e}")
-                video_summary['bedrock_vibe_analysis'] = {
-                    "vibe": "Bedrock unavailable", 
-                    "confidence": 0, 
-                    "note": f"Error: {str(e)}",
-                    "error_type": "system_error"
-                }
+            video_summary['bedrock_vibe_analysis'] = await analyze_video_vibe(transcript)
             video_summary["narrative"] = f"Analyzed {len(frames)} frames from {video_summary.get('video_duration_seconds', 0):.0f}s video. Found {len(video_summary.get('key_scenes', []))} key moments."
             
             print(f"✅ Video analysis complete: {len(frames)} frames, {len(video_summary.get('key_scenes', []))} key scenes")
             
-            return {
+            result = {
                 "transcript": transcript,
+                "transcript_chunks": transcript_chunks,
+                "timeline": timeline.to_dict(),
                 "video_analysis": video_summary,
                 "raw_frames": frame_results if vision_mode == "detailed" else [],  # Include raw data only in detailed mode
                 "is_video": True,
@@ -373,41 +559,202 @@ async def transcribe_audio_file(
                 "validated": validate,
                 "vision_mode": vision_mode
             }
+            # Only complete analyses are cached: partial vision or a failed vibe check
+            # (often a transient outage) is recomputed on the next upload
+            if vision_complete and "error_type" not in video_summary["bedrock_vibe_analysis"]:
+                try:
+                    await video_result_cache.set_async(result_key, result)
+                except (OSError, TypeError, ValueError) as e:
+                    print(f"⚠️ Could not cache video analysis: {e}")
+            else:
+                print("⚠️ Video analysis incomplete - not caching it")
+            return result
         
         else:
-            # Standard audio transcription (existing flow)
-            print("🎤 Audio file - using standard transcription")
+            # Standard audio transcription: spool to disk and probe, so long recordings are
+            # transcribed in parallel chunks however small they compress (Opus/WebM)
             file.file.seek(0)
-            transcript = await transcription_service.transcribe_file_obj(file.file, filename)
+            storage = await temp_storage.acquire(expected_bytes=file.size or max_size)
+            temp_audio_path = storage.track(await upload_spooler.spool(file, suffix=Path(filename).suffix, max_bytes=max_size))
+            try:
+                media_info = await video_processor.probe_media(temp_audio_path)
+            except Exception as e:
+                # Unreadable for ffprobe (or ffprobe missing): let Whisper take it whole
+                print(f"⚠️ Could not probe audio ({e}) - using standard transcription")
+                with open(temp_audio_path, "rb") as audio_file:
+                    transcription = await transcription_service.transcribe_file_obj_with_timeline(audio_file, filename)
+            else:
+                print(f"🎤 Audio file ({media_info.duration:.1f}s)")
+                transcription = await transcription_service.transcribe_path(temp_audio_path, filename, duration=media_info.duration)
+            transcript = transcription["text"]
+            transcript_chunks = transcription["chunks"]
+            timeline = transcription["timeline"]
         if validate:
             transcript = await transcription_service.validate_and_enhance_transcript(transcript)
         return {
             "transcript": transcript,
+            "transcript_chunks": transcript_chunks,
+            "timeline": timeline.to_dict(),
             "is_video": False,
             "status": "success",
             "validated": validate
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except StorageQuotaExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except MediaProbeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         error_msg = str(e)
         print(f"Transcription/Analysis error: {error_msg}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {error_msg}")
     
     finally:
-        # Cleanup temporary files
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-            except:
-                pass
-        
-        # Cleanup frame session
-        if session_id:
-            try:
-                video_processor.cleanup_session(session_id)
-            except:
-                pass
+        # Cleanup temporary files (upload copy, extracted audio, frame session)
+        if storage:
+            await temp_storage.release(storage)
+        await slots.aclose()
+
+@app.post("/transcribe/stream-upload")
+async def transcribe_streamed_upload(
+    request: Request,
+    validate: bool = True,
+    vision_mode: str = "balanced"
+):
+    """
+    Analyze a video while it is still uploading
+    
+    Send the raw file as the request body with a streamable Content-Type (video/webm,
+    video/x-matroska, video/mp2t or video/ogg). Audio segments are transcribed and
+    sampled frames analyzed as ffmpeg decodes them, instead of after the upload ends.
+    MP4/MOV uploads should use /transcribe/file.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in STREAMABLE_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Pipelined upload needs one of {', '.join(sorted(STREAMABLE_CONTENT_TYPES))}; "
+                   f"upload {content_type or 'this file'} to /transcribe/file instead"
+        )
+    if not os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY") == "your_openai_api_key_here":
+        raise HTTPException(status_code=503, detail="OPENAI_API_KEY not configured. Video analysis requires Whisper and GPT-4o Vision.")
+    declared = int(request.headers.get("content-length") or 0)
+    if declared > MAX_VIDEO_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Upload is {declared / (1024 * 1024):.1f}MB, limit is {MAX_VIDEO_UPLOAD_BYTES / (1024 * 1024):.0f}MB"
+        )
+    
+    # Same order as /transcribe/file: the concurrent-video slot first, then temp storage
+    async with frame_preprocessor.video_slot():
+        try:
+            # Audio segments are what the pipeline writes; reserve as /transcribe/file does
+            storage = await temp_storage.acquire(expected_bytes=(declared or MAX_VIDEO_UPLOAD_BYTES) * VIDEO_DISK_FACTOR)
+        except StorageQuotaExceeded as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        semaphore = asyncio.Semaphore(transcription_service.max_chunk_concurrency)
+        ingest = PipelinedIngest(
+            transcribe_segment=lambda segment: transcription_service.transcribe_chunk(segment, semaphore),
+            analyze_frames=lambda frames: analyze_frames(frames, vision_mode),
+            deduplicator=frame_deduplicator,
+            temp_dir=video_processor.temp_dir,
+            segment_seconds=PIPELINE_SEGMENT_SECONDS,
+            frame_interval=PIPELINE_FRAME_INTERVAL_SECONDS,
+            max_frames=PIPELINE_MAX_FRAMES,
+            frame_profile=vision_mode,
+            max_bytes=MAX_VIDEO_UPLOAD_BYTES,
+            max_disk_bytes=storage.reserved_bytes
+        )
+        storage.track(ingest.output_dir)
+        # No disconnect polling here: is_disconnected() would consume body messages.
+        # A client that goes away mid-upload surfaces as ClientDisconnect from the stream.
+        try:
+            result = await asyncio.wait_for(ingest.run(request.stream()), UPLOAD_PROCESSING_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"Processing exceeded {UPLOAD_PROCESSING_TIMEOUT_SECONDS:.0f}s")
+        except ClientDisconnect:
+            print("🔌 Client disconnected during pipelined upload - processing cancelled")
+            raise HTTPException(status_code=499, detail="Client closed request")
+        except MediaProbeError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except StorageQuotaExceeded as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception as e:
+            print(f"Pipelined ingest error: {e}")
+            raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+        finally:
+            await temp_storage.release(storage)
+    
+    transcription = transcription_service.merge_chunk_results(result["segments"])
+    transcript = transcription["text"]
+    if validate and transcript:
+        transcript = await transcription_service.validate_and_enhance_transcript(transcript)
+    
+    frame_results = [f for f in result["frame_results"] if "error" not in f and "timestamp" in f]
+    video_summary = video_aggregator.aggregate_frame_results(frame_results, transcript, video_duration=result["duration"])
+    video_summary['bedrock_vibe_analysis'] = await analyze_video_vibe(transcript)
+    video_summary["narrative"] = f"Analyzed {len(result['frames'])} frames from {video_summary.get('video_duration_seconds', 0):.0f}s video. Found {len(video_summary.get('key_scenes', []))} key moments."
+    
+    return {
+        "transcript": transcript,
+        "transcript_chunks": transcription["chunks"],
+        "timeline": transcription["timeline"].to_dict(),
+        "video_analysis": video_summary,
+        "raw_frames": frame_results if vision_mode == "detailed" else [],
+        "is_video": True,
+        "status": "success",
+        "validated": validate,
+        "vision_mode": vision_mode,
+        "pipelined": True
+    }
+
+@app.websocket("/ws/transcribe")
+async def websocket_transcribe(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Live captioning: send binary recorder chunks (e.g. MediaRecorder webm), receive
+    {"type": "transcript", "text", "start", "end"} messages. Send "stop" to flush and finish.
+    Pass ?session_id=... to re-attach to a session after a reconnect.
+    """
+    await websocket.accept()
+    
+    async def send_caption(caption: Dict[str, Any]):
+        await websocket.send_json({"type": "transcript", **caption})
+    
+    try:
+        session = await stream_manager.open_session(send_caption, session_id)
+    except Exception as e:
+        await websocket.send_json({"type": "error", "message": str(e)})
+        await websocket.close()
+        return
+    
+    await websocket.send_json({"type": "session", "session_id": session.session_id})
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                await session.feed(message["bytes"])
+            elif message.get("text"):
+                text = message["text"].strip()
+                command = json.loads(text).get("type") if text.startswith("{") else text
+                if command == "stop":
+                    await stream_manager.close_session(session.session_id, flush=True)
+                    await websocket.send_json({"type": "done", "session_id": session.session_id})
+                    await websocket.close()
+                    break
+    except WebSocketDisconnect:
+        # Session stays open until idle eviction so a reconnecting client can resume it
+        pass
+    except Exception as e:
+        print(f"[STREAM] WebSocket error for {session.session_id}: {e}")
+        await stream_manager.close_session(session.session_id, flush=False)
 
 @app.post("/process/transcript")
 async def process_transcript(request: TranscriptRequest):
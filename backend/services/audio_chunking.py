@@ -0,0 +1,208 @@
+import os
+import re
+import uuid
+import asyncio
+import shutil
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from services.video_service import AUDIO_ENCODINGS
+from services.process_runner import ProcessRunner, ProcessTimeout, get_process_runner
+
+# stderr lines silencedetect parsing needs: input duration and silence boundaries
+SILENCEDETECT_PATTERN = r"Duration:|silence_start|silence_end"
+
+class AudioChunker:
+    """Splits long recordings at silence boundaries so chunks can be transcribed in parallel"""
+
+    def __init__(
+        self,
+        temp_dir: str = "/tmp/eve_video",
+        target_chunk_seconds: float = 120.0,
+        max_chunk_seconds: float = 240.0,
+        silence_threshold_db: int = -35,
+        min_silence_seconds: float = 0.4,
+        encoding: str = "opus",
+        runner: Optional[ProcessRunner] = None
+    ):
+        self.temp_dir = temp_dir
+        self.target_chunk_seconds = target_chunk_seconds
+        self.max_chunk_seconds = max_chunk_seconds
+        self.silence_threshold_db = silence_threshold_db
+        self.min_silence_seconds = min_silence_seconds
+        self.encoding = encoding
+        self.runner = runner or get_process_runner()
+        Path(temp_dir).mkdir(parents=True, exist_ok=True)
+
+    async def get_duration(self, audio_path: str) -> float:
+        """Container duration in seconds via ffprobe (0.0 if unknown)"""
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            audio_path
+        ]
+        try:
+            result = await self.runner.run(cmd, timeout=10)
+            return float(result.stdout.decode().strip())
+        except Exception:
+            return 0.0
+
+    async def detect_silences(self, audio_path: str) -> Tuple[float, List[Tuple[float, float]]]:
+        """
+        Run ffmpeg silencedetect over the audio
+
+        Returns:
+            (duration_seconds, [(silence_start, silence_end), ...])
+        """
+        cmd = [
+            "ffmpeg",
+            "-i", audio_path,
+            "-vn",
+            "-af", f"silencedetect=noise={self.silence_threshold_db}dB:d={self.min_silence_seconds}",
+            "-f", "null",
+            "-"
+        ]
+
+        try:
+            result = await self.runner.run(cmd, timeout=300, stderr_pattern=SILENCEDETECT_PATTERN, capture_stdout=False)
+        except ProcessTimeout:
+            raise Exception("Silence detection timed out (>5 minutes)")
+
+        if result.returncode != 0:
+            raise Exception(f"Silence detection failed: {result.stderr_tail}")
+
+        return self.parse_silencedetect(result.matched_stderr)
+
+    @staticmethod
+    def parse_silencedetect(stderr: str) -> Tuple[float, List[Tuple[float, float]]]:
+        """Parse input duration and silence intervals from ffmpeg silencedetect output"""
+        duration = 0.0
+        match = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", stderr)
+        if match:
+            hours, minutes, seconds = match.groups()
+            duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+        silences = []
+        silence_start = None
+        for line in stderr.splitlines():
+            start_match = re.search(r"silence_start:\s*(-?\d+(?:\.\d+)?)", line)
+            if start_match:
+                silence_start = max(0.0, float(start_match.group(1)))
+                continue
+            end_match = re.search(r"silence_end:\s*(\d+(?:\.\d+)?)", line)
+            if end_match and silence_start is not None:
+                silences.append((silence_start, float(end_match.group(1))))
+                silence_start = None
+
+        # Trailing silence that runs to the end of the file
+        if silence_start is not None and duration > silence_start:
+            silences.append((silence_start, duration))
+
+        return duration, silences
+
+    def plan_cut_points(self, duration: float, silences: List[Tuple[float, float]]) -> List[float]:
+        """
+        Pick cut points near every target_chunk_seconds, preferring the middle of a silence
+
+        Falls back to a hard cut when no silence exists before max_chunk_seconds.
+        """
+        candidates = sorted((start + end) / 2 for start, end in silences)
+        cuts = []
+        last_cut = 0.0
+
+        while duration - last_cut > self.max_chunk_seconds:
+            target = last_cut + self.target_chunk_seconds
+            window_start = last_cut + self.target_chunk_seconds / 2
+            window_end = last_cut + self.max_chunk_seconds
+            in_window = [c for c in candidates if window_start <= c <= window_end]
+
+            if in_window:
+                cut = min(in_window, key=lambda c: abs(c - target))
+            else:
+                cut = target
+
+            cuts.append(round(cut, 3))
+            last_cut = cut
+
+        return cuts
+
+    async def split(self, audio_path: str) -> List[Dict[str, Any]]:
+        """
+        Split audio into 16kHz mono chunks (Opus/OGG by default) at silence boundaries
+
+        Returns:
+            List of dicts: {"path": str, "index": int, "start": float, "end": float, "session_id": str}
+        """
+        duration, silences = await self.detect_silences(audio_path)
+        cuts = self.plan_cut_points(duration, silences)
+
+        session_id = str(uuid.uuid4())
+        output_dir = os.path.join(self.temp_dir, session_id)
+        os.makedirs(output_dir, exist_ok=True)
+
+        segment_list = os.path.join(output_dir, "chunks.csv")
+        cmd = [
+            "ffmpeg",
+            "-i", audio_path,
+            "-vn",
+            *AUDIO_ENCODINGS[self.encoding]["args"],
+            "-f", "segment",
+            "-reset_timestamps", "1",
+            "-segment_list", segment_list,
+            "-segment_list_type", "csv",
+        ]
+        if cuts:
+            cmd += ["-segment_times", ",".join(f"{c:.3f}" for c in cuts)]
+        elif duration > 0:
+            # One chunk covering the whole file
+            cmd += ["-segment_time", str(int(duration) + 1)]
+        else:
+            # Unknown duration, so no cut points: fixed-length chunks rather than 1s ones
+            cmd += ["-segment_time", f"{self.target_chunk_seconds:g}"]
+        extension = AUDIO_ENCODINGS[self.encoding]["extension"]
+        cmd += ["-y", os.path.join(output_dir, f"chunk_%04d{extension}")]
+
+        try:
+            result = await self.runner.run(cmd, timeout=300, capture_stdout=False)
+            if result.returncode != 0:
+                raise Exception(result.stderr_tail)
+
+            chunks = []
+            with open(segment_list) as f:
+                for index, line in enumerate(f):
+                    parts = line.strip().split(",")
+                    if len(parts) < 3:
+                        continue
+                    chunks.append({
+                        "path": os.path.join(output_dir, parts[0]),
+                        "index": index,
+                        "start": float(parts[1]),
+                        "end": float(parts[2]),
+                        "session_id": session_id
+                    })
+
+            if not chunks:
+                raise Exception("no audio chunks were produced")
+
+            print(f"✂️ Split {duration:.1f}s of audio into {len(chunks)} chunks ({len(silences)} silences found)")
+            return chunks
+
+        except ProcessTimeout:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise Exception("Audio chunking timed out (>5 minutes)")
+        except asyncio.CancelledError:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
+        except Exception as e:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise Exception(f"Audio chunking failed: {str(e)}")
+
+    def cleanup_chunks(self, chunks: List[Dict[str, Any]]):
+        """Remove the session directory holding the chunk files"""
+        for session_id in {chunk["session_id"] for chunk in chunks}:
+            session_dir = os.path.join(self.temp_dir, session_id)
+            if os.path.exists(session_dir):
+                shutil.rmtree(session_dir)
+                print(f"🧹 Cleaned up audio chunks: {session_id}")
@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file_obj(file_obj, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """SHA-256 of a file-like object, read in chunks; leaves the position at the start"""
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    while True:
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file on disk"""
+    with open(path, "rb") as f:
+        return hash_file_obj(f)
+
+
+def make_cache_key(*parts: Any) -> str:
+    """Combine a content hash and parameters into a filesystem-safe key"""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class JsonDiskCache:
+    """
+    In-memory LRU in front of an on-disk JSON store
+
+    Disk entries are evicted least-recently-used first (atime is bumped on every hit)
+    once the store grows past max_disk_bytes. With ttl_seconds set, entries also expire
+    that long after they were written (mtime), however often they are read.
+
+    get/set touch the disk (and set may walk the whole store to evict); from async
+    code use get_async/set_async, which run them on a worker thread.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        max_memory_entries: int = 256,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.memory: "OrderedDict[str, Any]" = OrderedDict()
+        self.written: Dict[str, float] = {}  # when each in-memory entry was stored, for the TTL
+        self.lock = threading.Lock()
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self.disk_bytes = sum(p.stat().st_size for p in Path(directory).glob("*/*.json"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _remember(self, key: str, value: Any, written: float):
+        self.memory[key] = value
+        self.written[key] = written
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            evicted, _ = self.memory.popitem(last=False)
+            self.written.pop(evicted, None)
+
+    def _expired(self, written: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - written > self.ttl_seconds
+
+    def _forget(self, key: str):
+        """Drop an entry from memory and disk"""
+        self.memory.pop(key, None)
+        self.written.pop(key, None)
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            self.disk_bytes -= size
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            if key in self.memory:
+                if self._expired(self.written[key]):
+                    self._forget(key)
+                    return None
+                self.memory.move_to_end(key)
+                value, written = self.memory[key], self.written[key]
+            else:
+                value = None
+
+        path = self._path(key)
+        if value is not None:
+            # Keep hot entries recent on disk too, or disk eviction would remove them first
+            try:
+                os.utime(path, (time.time(), written))
+            except OSError:
+                pass
+            return value
+        try:
+            written = os.path.getmtime(path)
+            if self._expired(written):
+                with self.lock:
+                    self._forget(key)
+                return None
+            with open(path) as f:
+                value = json.load(f)
+            # Mark as recently used for disk eviction; mtime keeps the write time for the TTL
+            os.utime(path, (time.time(), written))
+        except (OSError, ValueError):
+            return None
+
+        with self.lock:
+            self._remember(key, value, written)
+        return value
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: Any):
+        await asyncio.to_thread(self.set, key, value)
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value).encode("utf-8")
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self._remember(key, value, time.time())
+            self.disk_bytes += len(data) - previous_size
+            if self.disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Delete expired files, then least-recently-used ones until the store is back under 90% of the cap"""
+        entries = []
+        removed = 0
+        for p in Path(self.directory).glob("*/*.json"):
+            try:
+                stat = p.stat()
+                if self._expired(stat.st_mtime):
+                    p.unlink()
+                    removed += 1
+                    self.memory.pop(p.stem, None)
+                    self.written.pop(p.stem, None)
+                    continue
+                entries.append((stat.st_atime, stat.st_size, p))
+            except OSError:
+                continue
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.9
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                p.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            self.memory.pop(p.stem, None)
+            self.written.pop(p.stem, None)
+
+        self.disk_bytes = total
+        if removed:
+            print(f"🧹 Cache {self.directory}: evicted {removed} entries ({total / (1024 * 1024):.1f}MB kept)")
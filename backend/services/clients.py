@@ -0,0 +1,47 @@
+import openai
+import httpx
+from typing import Dict, Optional
+
+# Shared, pooled provider clients.
+# Every service borrows its client from here so one uvicorn worker keeps a single
+# keep-alive connection pool and can overlap many in-flight provider calls.
+
+PLACEHOLDER_OPENAI_KEY = "your_openai_api_key_here"
+
+# AsyncOpenAI adopts the http_client's timeout unless given its own. Whisper uploads of
+# 25MB files and long completions need the SDK's 10-minute default, not the pool's 60s.
+OPENAI_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+_http_client: Optional[httpx.AsyncClient] = None
+_openai_clients: Dict[str, openai.AsyncOpenAI] = {}
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client (created lazily, reused across requests)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=httpx.Timeout(60.0, connect=10.0)
+        )
+    return _http_client
+
+
+def get_openai_client(api_key: Optional[str]) -> Optional[openai.AsyncOpenAI]:
+    """Return a shared AsyncOpenAI client for this key, or None if the key is not configured"""
+    if not api_key or api_key == PLACEHOLDER_OPENAI_KEY:
+        return None
+    client = _openai_clients.get(api_key)
+    if client is None:
+        client = openai.AsyncOpenAI(api_key=api_key, http_client=get_http_client(), timeout=OPENAI_TIMEOUT)
+        _openai_clients[api_key] = client
+    return client
+
+
+async def close_clients():
+    """Close pooled connections (call on application shutdown)"""
+    global _http_client
+    _openai_clients.clear()
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
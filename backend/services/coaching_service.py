@@ -1,10 +1,10 @@
-import openai
+from services.clients import get_openai_client
 import json
 from typing import Dict, Any, Optional
 
 class CoachingService:
     def __init__(self, openai_key: Optional[str] = None):
-        self.client = openai.OpenAI(api_key=openai_key) if openai_key and openai_key != "your_openai_api_key_here" else None
+        self.client = get_openai_client(openai_key)
 
     async def generate_coaching_insights(self, transcript: str, context: str) -> Dict[str, Any]:
         if not self.client:
@@ -41,7 +41,7 @@ class CoachingService:
         }}
         """
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a FAANG interview coach who provides structured, actionable feedback in JSON format."},
@@ -69,7 +69,7 @@ class CoachingService:
         Return a JSON object: {{"key_tips": [...], "follow_ups": [...]}}
         """
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a career advisor who extracts key tips and follow-up actions into a structured JSON response."},
@@ -1,4 +1,4 @@
-import openai
+from services.clients import get_openai_client
 from typing import Dict, Any, List, Optional, Tuple
 import math
 import json
@@ -6,12 +6,12 @@ import json
 
 class CoffeeChatService:
 	def __init__(self, openai_key: Optional[str]):
-		self.client = openai.OpenAI(api_key=openai_key) if openai_key else None
+		self.client = get_openai_client(openai_key)
 
-	def _chat_json(self, system: str, user: str, max_tokens: int = 1200) -> Dict[str, Any]:
+	async def _chat_json(self, system: str, user: str, max_tokens: int = 1200) -> Dict[str, Any]:
 		if not self.client:
 			return {}
-		resp = self.client.chat.completions.create(
+		resp = await self.client.chat.completions.create(
 			model="gpt-4o",
 			messages=[
 				{"role": "system", "content": system},
@@ -24,7 +24,7 @@ class CoffeeChatService:
 		content = resp.choices[0].message.content
 		return json.loads(content) if content else {}
 
-	def extract_tips_and_followups(self, sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+	async def extract_tips_and_followups(self, sections: List[Dict[str, Any]]) -> Dict[str, Any]:
 		"""Extract tips, follow-ups, and content evidence from cleaned sections JSON."""
 		if not self.client:
 			return {"tips": [], "follow_ups": [], "content_evidence": []}
@@ -39,7 +39,7 @@ class CoffeeChatService:
 			"\"follow_ups\":[{\"id\":\"f1\",\"text\":\"...\",\"method\":\"email|linkedin|other\",\"confidence\":0.0}],\n"
 			"\"content_evidence\":[{\"text\":\"...\",\"span\":\"Speaker A - 00:12:00\"}]}\n"
 		)
-		return self._chat_json(system, user, max_tokens=1200)
+		return await self._chat_json(system, user, max_tokens=1200)
 
 	def compute_content_score(self, tips: List[Dict[str, Any]], follow_ups: List[Dict[str, Any]], evidence: List[Dict[str, Any]]) -> float:
 		if not tips and not follow_ups:
@@ -77,7 +77,7 @@ class CoffeeChatService:
 			"components": {"vision": round(v, 2), "audio": round(a, 2), "content": round(c, 2)}
 		}
 
-	def generate_coaching_and_spoken(self, tasks: List[Dict[str, Any]], tips: List[Dict[str, Any]], vibe_label: str) -> Dict[str, Any]:
+	async def generate_coaching_and_spoken(self, tasks: List[Dict[str, Any]], tips: List[Dict[str, Any]], vibe_label: str) -> Dict[str, Any]:
 		if not self.client:
 			return {"spoken": "", "coaching": []}
 		system = "You are EVE, a friendly assistant. Return JSON with keys spoken and coaching (2 items)."
@@ -86,9 +86,9 @@ class CoffeeChatService:
 			"\n- tips: " + json.dumps(tips, ensure_ascii=False) +
 			f"\n- vibe_label: {vibe_label}\n\nProduce a short spoken confirmation (1-2 sentences) and 2 bullet coaching suggestions. Return JSON {{\"spoken\":\"...\",\"coaching\":[\"...\",\"...\"]}}."
 		)
-		return self._chat_json(system, user, max_tokens=300)
+		return await self._chat_json(system, user, max_tokens=300)
 
-	def draft_followup_email(self, person_name: Optional[str], company: Optional[str], highlights: List[str], ask: Optional[str], vibe_label: str) -> Dict[str, Any]:
+	async def draft_followup_email(self, person_name: Optional[str], company: Optional[str], highlights: List[str], ask: Optional[str], vibe_label: str) -> Dict[str, Any]:
 		if not self.client:
 			return {"email_subject": "", "email_body": ""}
 		system = "You draft concise professional follow-up emails (4-6 sentences). Return JSON with email_subject and email_body."
@@ -103,4 +103,4 @@ class CoffeeChatService:
 			"Inputs: " + json.dumps(payload, ensure_ascii=False) +
 			"\nReturn JSON with keys email_subject and email_body (no placeholders)."
 		)
-		return self._chat_json(system, user, max_tokens=400)
+		return await self._chat_json(system, user, max_tokens=400)
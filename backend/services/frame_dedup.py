@@ -0,0 +1,94 @@
+import io
+import numpy as np
+from PIL import Image
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+class FrameDeduplicator:
+    """
+    Collapses near-duplicate frames (a slide held on screen, a static screen share)
+    before they reach the vision model
+
+    Each frame gets a difference hash (dHash): the frame is shrunk to a
+    (hash_size + 1) x hash_size grayscale thumbnail and every bit records whether a
+    pixel is brighter than its right neighbour. Frames within max_distance bits of an
+    already kept frame are duplicates of it.
+    """
+
+    def __init__(self, hash_size: int = 8, max_distance: int = 6):
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+
+    def dhash(self, image: Union[str, bytes]) -> int:
+        """Hash an image file path or encoded image bytes"""
+        with Image.open(io.BytesIO(image) if isinstance(image, bytes) else image) as img:
+            thumb = img.convert("L").resize((self.hash_size + 1, self.hash_size), Image.Resampling.BILINEAR)
+        pixels = np.asarray(thumb, dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+    def deduplicate(
+        self,
+        frames: List[Dict[str, Any]],
+        kept: Optional[List[Tuple[int, Dict[str, Any]]]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[int, int]]:
+        """
+        Args:
+            frames: Frames to check, in order
+            kept: (hash, frame) pairs kept by earlier calls, extended in place, so frames
+                  arriving in batches are also compared against earlier batches
+        
+        Returns:
+            (frames to analyze, {duplicate frame number: number of the frame it repeats})
+        """
+        kept = [] if kept is None else kept
+        previously_kept = len(kept)
+        duplicates: Dict[int, int] = {}
+        for frame in frames:
+            try:
+                frame_hash = self.dhash(frame["data"] if frame.get("data") is not None else frame["path"])
+            except Exception as e:
+                print(f"⚠️ Could not hash frame {frame['number']}: {e}")
+                kept.append((-1, frame))
+                continue
+            # Compare against every kept frame, so a slide that is shown again also matches
+            match = next(
+                (k for h, k in kept if h >= 0 and bin(h ^ frame_hash).count("1") <= self.max_distance),
+                None
+            )
+            if match is not None:
+                duplicates[frame["number"]] = match["number"]
+            else:
+                kept.append((frame_hash, frame))
+
+        unique = [frame for _, frame in kept[previously_kept:]]
+        if duplicates:
+            print(f"🪞 Frame dedup: {len(frames)} frames -> {len(unique)} unique ({len(duplicates)} duplicates skipped)")
+        return unique, duplicates
+
+    @staticmethod
+    def expand_results(
+        results: List[Dict[str, Any]],
+        frames: List[Dict[str, Any]],
+        duplicates: Dict[int, int]
+    ) -> List[Dict[str, Any]]:
+        """Copy each analyzed frame's result to its duplicates, in timestamp order"""
+        if not duplicates:
+            return results
+
+        by_number = {r.get("frame_number"): r for r in results}
+        expanded = list(results)
+        for frame in frames:
+            source = by_number.get(duplicates.get(frame["number"]))
+            if source is None:
+                continue
+            expanded.append({
+                **source,
+                "timestamp": frame["timestamp"],
+                "frame_number": frame["number"],
+                "path": frame.get("path"),
+                "duplicate_of": source.get("frame_number"),
+                # A repeated frame is by definition not a new scene
+                "scene_change": False
+            })
+        expanded.sort(key=lambda r: r.get("timestamp", 0))
+        return expanded
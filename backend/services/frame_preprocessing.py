@@ -0,0 +1,163 @@
+import io
+import os
+import time
+import base64
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from PIL import Image
+
+
+def prepare_image(
+    image: Union[str, bytes],
+    max_dimension: int = 512,
+    quality: int = 80,
+    mime_type: str = "image/jpeg"
+) -> Dict[str, Any]:
+    """
+    Make one frame ready to send: fit it into max_dimension, JPEG-encode and base64 it
+
+    Runs in a worker process, so it only takes and returns picklable values. A JPEG
+    that already fits (ffmpeg scaled it) is passed through without re-encoding.
+
+    Returns:
+        {"base64": str, "mime_type": str, "width": int, "height": int, "size": int}
+    """
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            data = f.read()
+    else:
+        data = image
+
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        if max(width, height) > max_dimension or mime_type != "image/jpeg" or img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+            img.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+            width, height = img.size
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=quality, optimize=True)
+            data = buffer.getvalue()
+            mime_type = "image/jpeg"
+
+    return {
+        "base64": base64.b64encode(data).decode("utf-8"),
+        "mime_type": mime_type,
+        "width": width,
+        "height": height,
+        "size": len(data)
+    }
+
+
+def _worker_ready(hold_seconds: float) -> int:
+    """Warm-up job: holds its worker briefly so the other jobs reach the other workers"""
+    time.sleep(hold_seconds)
+    return os.getpid()
+
+
+class FramePreprocessor:
+    """
+    Resizes, encodes and base64s frames on a process pool instead of the event loop
+
+    Frames come back with "base64" (and a matching "mime_type") set, which the vision
+    analyzers send as-is. max_concurrent_videos caps how many uploads run their video
+    pipeline at once, so a burst of uploads queues rather than oversubscribing the
+    pool (and ffmpeg) - callers hold video_slot() for the duration of one video.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_concurrent_videos: int = 4):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.max_concurrent_videos = max_concurrent_videos
+        self.video_slots = asyncio.Semaphore(max_concurrent_videos)
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # spawn: forking a process that runs an event loop and client threads is unsafe
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    async def warm_up(self):
+        """
+        Start the workers now, so the first video does not pay for spawning them
+
+        Each spawned worker starts a fresh interpreter and re-imports this module (and,
+        when the app is run as a script, the app module) before it can take a frame.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        # Workers still importing take no jobs yet, so repeat until every one has answered
+        ready = set()
+        try:
+            for _ in range(20):
+                pids = await asyncio.gather(*(
+                    loop.run_in_executor(executor, _worker_ready, 0.1) for _ in range(self.max_workers)
+                ))
+                ready.update(pids)
+                if len(ready) >= self.max_workers:
+                    break
+        except BrokenProcessPool:
+            self.shutdown()  # the first video starts a fresh pool instead
+            raise
+        print(f"🧵 Frame preprocessing pool ready ({len(ready)} workers)")
+
+    @asynccontextmanager
+    async def video_slot(self) -> AsyncIterator[None]:
+        """Hold one of the max_concurrent_videos slots"""
+        if self.video_slots.locked():
+            print(f"⏳ {self.max_concurrent_videos} videos already processing - waiting for a slot")
+        async with self.video_slots:
+            yield
+
+    async def prepare(self, frames: List[Dict[str, Any]], max_dimension: int = 512, quality: int = 80) -> List[Dict[str, Any]]:
+        """
+        Add "base64" to every frame, in parallel across the pool
+
+        Frames that fail to decode are dropped (and logged) rather than failing the batch.
+        If a worker dies the pool is replaced and this batch runs on a thread instead.
+        """
+        try:
+            results = await self._run(frames, max_dimension, quality, self._get_executor())
+        except BrokenProcessPool as e:
+            print(f"⚠️ Frame preprocessing pool broke ({e}) - restarting it")
+            self.shutdown()
+            results = await self._run(frames, max_dimension, quality, None)
+
+        prepared = []
+        for frame, result in zip(frames, results):
+            if isinstance(result, BaseException):
+                print(f"⚠️ Could not prepare frame {frame['number']}: {result}")
+                continue
+            prepared.append({**frame, "base64": result["base64"], "mime_type": result["mime_type"]})
+        return prepared
+
+    async def _run(self, frames: List[Dict[str, Any]], max_dimension: int, quality: int, executor) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        jobs = [
+            loop.run_in_executor(
+                executor,
+                prepare_image,
+                frame["data"] if frame.get("data") is not None else frame["path"],
+                max_dimension,
+                quality,
+                frame.get("mime_type", "image/jpeg")
+            )
+            for frame in frames
+        ]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        broken = next((r for r in results if isinstance(r, BrokenProcessPool)), None)
+        if broken:
+            raise broken
+        return results
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
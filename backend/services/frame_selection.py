@@ -0,0 +1,139 @@
+import re
+import numpy as np
+from typing import List, Optional, Tuple
+
+from services.process_runner import ProcessRunner, get_process_runner
+
+class FrameSelectionPlanner:
+    """
+    Picks which timestamps are worth sending to the vision model
+
+    Candidate frames are decoded once as tiny grayscale thumbnails (keyframes only when
+    the video has enough of them) and scored against the previous candidate with
+    cheap local signals:
+    - histogram distance (lighting / layout changes)
+    - edge-density change (text appearing or disappearing, new slides)
+    - mean absolute pixel difference (the same measure as ffmpeg's scene score)
+    The top-K candidates, spread out by a minimum spacing, become the targets for
+    seek-based extraction. Selection is deterministic for a given file.
+    """
+
+    def __init__(
+        self,
+        thumbnail_size: int = 64,
+        max_candidates: int = 300,
+        min_candidate_gap: float = 0.5,
+        histogram_bins: int = 32,
+        edge_threshold: int = 24,
+        weights: Tuple[float, float, float] = (0.4, 0.3, 0.3),
+        runner: Optional[ProcessRunner] = None
+    ):
+        self.thumbnail_size = thumbnail_size
+        self.max_candidates = max_candidates
+        self.min_candidate_gap = min_candidate_gap
+        self.histogram_bins = histogram_bins
+        self.edge_threshold = edge_threshold
+        self.weights = weights
+        self.runner = runner or get_process_runner()
+
+    async def plan(self, video_path: str, duration: float, budget: int, start_time: float = 0.0) -> Optional[List[float]]:
+        """
+        Return up to budget timestamps in order, or None if candidates could not be
+        decoded (callers should fall back to even spacing)
+        
+        Timestamps are relative to the container start_time, the origin -ss seeks from.
+        Without a duration candidates cannot be spread over the video, so None is returned.
+        """
+        if duration <= 0:
+            return None
+        try:
+            times, thumbs = await self.decode_candidates(video_path, duration, keyframes_only=True)
+            if len(times) < 2 * budget:
+                # Sparse keyframes (long GOPs, screen recordings) - sample the full decode
+                times, thumbs = await self.decode_candidates(video_path, duration, keyframes_only=False)
+            times = [max(0.0, t - start_time) for t in times]
+        except Exception as e:
+            print(f"⚠️ Frame selection failed, using even spacing: {e}")
+            return None
+        if not times:
+            return None
+
+        scores = self.score(thumbs)
+        selected = self.select(times, scores, budget, duration)
+        print(f"🎯 Frame planner: {len(selected)} of {len(times)} candidates selected")
+        return selected
+
+    async def decode_candidates(self, video_path: str, duration: float, keyframes_only: bool) -> Tuple[List[float], np.ndarray]:
+        """Decode at most max_candidates gray thumbnails; returns (pts seconds, frames[n, size, size])"""
+        size = self.thumbnail_size
+        # The gap spreads candidates over the video; -frames:v caps them whatever the duration says
+        min_gap = max(max(duration, 0.0) / self.max_candidates, self.min_candidate_gap)
+        cmd = [
+            "ffmpeg",
+            *(["-skip_frame", "nokey"] if keyframes_only else []),
+            "-i", video_path,
+            "-map", "0:v:0", "-an",
+            "-vf", (f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{min_gap:.3f})',"
+                    f"scale={size}:{size}:flags=area,format=gray,showinfo"),
+            "-vsync", "vfr",
+            "-frames:v", str(self.max_candidates),
+            "-f", "rawvideo",
+            "pipe:1"
+        ]
+        result = await self.runner.run(cmd, timeout=300, stderr_pattern=r"Parsed_showinfo")
+        if result.returncode != 0:
+            raise Exception(f"Candidate decode failed: {result.stderr_tail}")
+
+        frame_bytes = size * size
+        n_frames = len(result.stdout) // frame_bytes
+        thumbs = np.frombuffer(result.stdout[:n_frames * frame_bytes], dtype=np.uint8).reshape(n_frames, size, size)
+        times = [float(t) for t in re.findall(r"pts_time:\s*(-?[\d.]+)", result.matched_stderr)]
+        n = min(len(times), n_frames)
+        return times[:n], thumbs[:n]
+
+    def score(self, thumbs: np.ndarray) -> np.ndarray:
+        """Informativeness of each candidate relative to the one before it (first frame scores 1)"""
+        if len(thumbs) == 0:
+            return np.zeros(0)
+        frames = thumbs.astype(np.int16)
+
+        bins = frames * self.histogram_bins // 256
+        hist = np.stack([np.bincount(b.ravel(), minlength=self.histogram_bins) for b in bins])
+        hist = hist / hist.sum(axis=1, keepdims=True)
+        hist_distance = 0.5 * np.abs(np.diff(hist, axis=0)).sum(axis=1)
+
+        gx = np.abs(np.diff(frames, axis=2))[:, :-1, :]
+        gy = np.abs(np.diff(frames, axis=1))[:, :, :-1]
+        edge_density = ((gx + gy) > self.edge_threshold).mean(axis=(1, 2))
+        edge_change = np.minimum(1.0, 4 * np.abs(np.diff(edge_density)))
+
+        pixel_change = np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2)) / 255.0
+        pixel_change = np.minimum(1.0, 4 * pixel_change)
+
+        w_hist, w_edge, w_pixel = self.weights
+        scores = w_hist * hist_distance + w_edge * edge_change + w_pixel * pixel_change
+        return np.concatenate([[1.0], scores])
+
+    @staticmethod
+    def select(times: List[float], scores: np.ndarray, budget: int, duration: float) -> List[float]:
+        """
+        Greedy top-K by score with a minimum spacing of duration / (2 * budget) so picks
+        do not cluster on one busy stretch; ties go to the earlier frame
+        """
+        order = sorted(range(len(times)), key=lambda i: (-scores[i], times[i]))
+        min_spacing = duration / (2 * budget) if budget > 0 else 0.0
+
+        chosen: List[int] = []
+        for i in order:
+            if len(chosen) >= budget:
+                break
+            if all(abs(times[i] - times[j]) >= min_spacing for j in chosen):
+                chosen.append(i)
+        # Spacing too strict for a short clip - top up with the best remaining frames
+        for i in order:
+            if len(chosen) >= budget:
+                break
+            if i not in chosen:
+                chosen.append(i)
+
+        return sorted(round(times[i], 3) for i in chosen)
@@ -26,6 +26,20 @@ class GeminiService:
         except Exception as e:
             raise Exception(f"Gemini API call failed: {str(e)}")
 
+    async def generate_content_async(self, prompt: str, model: str = "gemini-2.5-flash") -> str:
+        """Generate content using Gemini's async client (does not block the event loop)"""
+        if not self.client:
+            return "[DEMO MODE] Add GEMINI_API_KEY to .env to use Gemini"
+        
+        try:
+            response = await self.client.aio.models.generate_content(
+                model=model,
+                contents=prompt
+            )
+            return response.text
+        except Exception as e:
+            raise Exception(f"Gemini API call failed: {str(e)}")
+
     @staticmethod
     def _parse_json_best_effort(text: str) -> Dict[str, Any]:
         """Attempt to parse JSON from a Gemini response that may include code fences or extra text.
@@ -83,7 +97,7 @@ Transcript:
 {transcript}"""
 
         try:
-            response_text = self.generate_content(prompt)
+            response_text = await self.generate_content_async(prompt)
             parsed = self._parse_json_best_effort(response_text)
             # Ensure keys exist
             return {
@@ -147,7 +161,7 @@ Return JSON with EXACT structure:
 Transcript: {transcript}"""
 
         try:
-            response_text = self.generate_content(prompt)
+            response_text = await self.generate_content_async(prompt)
             parsed = self._parse_json_best_effort(response_text)
             
             # Ensure all required fields exist with proper structure
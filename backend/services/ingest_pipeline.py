@@ -0,0 +1,330 @@
+import os
+import re
+import json
+import uuid
+import shutil
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from services.frame_dedup import FrameDeduplicator
+from services.media_probe import MediaInfo, MediaProbeError, MediaProber
+from services.mjpeg import MjpegStreamParser
+from services.process_runner import ProcessRunner, get_process_runner, read_lines
+from services.temp_storage import StorageQuotaExceeded
+from services.upload_spool import UploadTooLarge
+from services.video_service import AUDIO_ENCODINGS, FRAME_PROFILES, SHOWINFO_PATTERN, VideoProcessor
+
+SegmentTranscriber = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+FrameBatchAnalyzer = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+# Containers ffmpeg can demux from a non-seekable pipe. Plain MP4/MOV usually keep their
+# index (moov) at the end of the file, so they must be uploaded whole instead.
+STREAMABLE_CONTENT_TYPES = {"video/webm", "video/x-matroska", "video/mp2t", "video/ogg"}
+
+# Bytes buffered from the start of the upload to find out which streams it has
+PROBE_HEAD_BYTES = 1024 * 1024
+
+
+class PipelinedIngest:
+    """
+    Processes one video while it is still being uploaded
+
+    The request body is written to ffmpeg's stdin as it arrives, and a single ffmpeg
+    process produces both halves of the analysis incrementally:
+    - audio is cut into segment_seconds WAV segments (segment muxer); each segment is
+      transcribed as soon as the segment list says it is complete
+    - one frame per frame_interval seconds is piped out as MJPEG; at most max_frames
+      of them are kept, spread evenly over the video however long it turns out to be
+      (each time the budget fills, every other kept frame is dropped and the effective
+      sampling interval doubles)
+    When the upload ends the kept frames are deduplicated and sent to vision in
+    concurrent batches of batch_size, and only the last audio segment is left to
+    transcribe, so time-to-result is roughly upload time plus one segment.
+    """
+
+    def __init__(
+        self,
+        transcribe_segment: SegmentTranscriber,
+        analyze_frames: FrameBatchAnalyzer,
+        deduplicator: Optional[FrameDeduplicator] = None,
+        temp_dir: str = "/tmp/eve_video",
+        segment_seconds: float = 60.0,
+        frame_interval: float = 10.0,
+        max_frames: int = 30,
+        batch_size: int = 4,
+        frame_profile: str = "balanced",
+        segment_poll_interval: float = 0.5,
+        max_bytes: Optional[int] = None,
+        max_disk_bytes: Optional[int] = None,
+        runner: Optional[ProcessRunner] = None
+    ):
+        self.transcribe_segment = transcribe_segment
+        self.analyze_frames = analyze_frames
+        self.deduplicator = deduplicator or FrameDeduplicator()
+        self.segment_seconds = segment_seconds
+        self.frame_interval = frame_interval
+        self.max_frames = max_frames
+        self.batch_size = batch_size
+        self.profile = FRAME_PROFILES.get(frame_profile, FRAME_PROFILES["balanced"])
+        self.segment_poll_interval = segment_poll_interval
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.runner = runner or get_process_runner()
+
+        self.session_id = str(uuid.uuid4())
+        self.output_dir = os.path.join(temp_dir, self.session_id)
+        self.segment_list = os.path.join(self.output_dir, "segments.csv")
+
+        self.bytes_received = 0
+        self.disk_bytes = 0                     # size of the completed audio segments
+        self.frame_times: List[float] = []      # showinfo pts_time, in frame order
+        self.frames: List[Dict[str, Any]] = []  # frames kept for vision, in frame order
+        self.frame_stride = 1                   # keep every frame_stride-th sampled frame
+        self.duplicates: Dict[int, int] = {}
+        self.frames_seen = 0
+        self.frames_sent = 0
+        self.segments: List[Dict[str, Any]] = []
+        self.segment_tasks: List[asyncio.Task] = []
+        self.vision_tasks: List[asyncio.Task] = []
+        self.stderr_tail: deque = deque(maxlen=20)
+        self.finished = asyncio.Event()
+
+    def build_command(self, has_audio: bool = True, has_video: bool = True) -> List[str]:
+        """
+        ffmpeg command reading the upload from stdin
+
+        An output whose stream is missing is left out entirely: ffmpeg refuses to start
+        with an output that has no streams, even when its map is optional.
+        """
+        cmd = ["ffmpeg", "-y", "-i", "pipe:0"]
+        if has_audio:
+            cmd += [
+                # PCM segments need no optional encoder (libopus) and are final once closed
+                "-map", "0:a:0?", "-vn", *AUDIO_ENCODINGS["wav"]["args"],
+                "-f", "segment",
+                "-segment_time", f"{self.segment_seconds:g}",
+                "-segment_list", self.segment_list,
+                "-segment_list_type", "csv",
+                "-reset_timestamps", "1",
+                os.path.join(self.output_dir, "audio_%04d.wav")
+            ]
+        if has_video:
+            scale = VideoProcessor.scale_filter(self.profile["max_dimension"])
+            cmd += [
+                "-map", "0:v:0?", "-an",
+                "-vf", f"{VideoProcessor.sample_filter(self.frame_interval)},{scale},showinfo",
+                "-vsync", "vfr",
+                "-f", "image2pipe", *VideoProcessor.image_codec_args("jpeg", self.profile["quality"]),
+                "pipe:1"
+            ]
+        return cmd
+
+    async def _read_head(self, body: AsyncIterator[bytes]) -> bytes:
+        """Buffer the first PROBE_HEAD_BYTES of the upload (less if it is shorter)"""
+        chunks = []
+        size = 0
+        while size < PROBE_HEAD_BYTES:
+            try:
+                chunk = await body.__anext__()
+            except StopAsyncIteration:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        return b"".join(chunks)
+
+    async def _probe_head(self, head: bytes) -> MediaInfo:
+        """
+        Find the streams of the upload from its first bytes
+
+        Streamable containers declare their tracks up front, so the head is enough.
+
+        Raises:
+            MediaProbeError if ffprobe cannot read it or finds neither audio nor video
+        """
+        head_path = os.path.join(self.output_dir, "head")
+        with open(head_path, "wb") as f:
+            f.write(head)
+        try:
+            result = await self.runner.run(
+                ["ffprobe", "-v", "error", "-show_entries",
+                 "stream=index,codec_type,codec_name:stream_disposition=attached_pic",
+                 "-of", "json", head_path],
+                timeout=10
+            )
+        finally:
+            os.remove(head_path)
+        if result.returncode != 0:
+            raise MediaProbeError(f"Could not read media stream: {result.stderr_tail}")
+        try:
+            info = MediaProber.parse(json.loads(result.stdout or b"{}"))
+        except ValueError:
+            raise MediaProbeError("Could not parse ffprobe output")
+        if not info.has_audio and not info.has_video:
+            raise MediaProbeError("Upload contains no audio or video streams")
+        return info
+
+    async def run(self, body: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Feed body (e.g. request.stream()) through the pipeline
+
+        Returns:
+            {"segments": [transcribe_segment results], "frames": [frames considered],
+             "frame_results": [...] in timestamp order (duplicates expanded),
+             "duration": float, "bytes_received": int}
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        try:
+            body = body.__aiter__()
+            head = await self._read_head(body)
+            self._count_bytes(len(head))
+            media_info = await self._probe_head(head)
+            if not media_info.has_audio:
+                print("🔇 Pipelined upload has no audio track - frames only")
+            if not media_info.has_video:
+                print("🎧 Pipelined upload has no video track - audio only")
+            cmd = self.build_command(has_audio=media_info.has_audio, has_video=media_info.has_video)
+            async with self.runner.open(cmd) as process:
+                watcher = asyncio.create_task(self._watch_segments())
+                try:
+                    await asyncio.gather(
+                        self._feed(process, head, body),
+                        self._read_frames(process),
+                        self._read_stderr(process)
+                    )
+                    returncode = await process.wait()
+                finally:
+                    self.finished.set()
+                    await asyncio.gather(watcher, return_exceptions=True)
+            if returncode != 0:
+                raise Exception("\n".join(self.stderr_tail))
+
+            self._start_new_segments()
+            self._dispatch_frames()
+            segments = await asyncio.gather(*self.segment_tasks)
+            batches = await asyncio.gather(*self.vision_tasks)
+        except BaseException:
+            for task in self.segment_tasks + self.vision_tasks:
+                task.cancel()
+            await asyncio.gather(*self.segment_tasks, *self.vision_tasks, return_exceptions=True)
+            raise
+        finally:
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+
+        frame_results = [result for batch in batches for result in batch]
+        frame_results = self.deduplicator.expand_results(frame_results, self.frames, self.duplicates)
+        duration = max(
+            [s["end"] for s in self.segments] + [f["timestamp"] for f in self.frames] + [0.0]
+        )
+        print(f"🚰 Pipelined ingest: {self.bytes_received / (1024 * 1024):.2f}MB, "
+              f"{len(segments)} audio segments, {self.frames_sent} of {self.frames_seen} frames analyzed")
+        return {
+            "segments": list(segments),
+            "frames": self.frames,
+            "frame_results": frame_results,
+            "duration": duration,
+            "bytes_received": self.bytes_received
+        }
+
+    async def _feed(self, process: asyncio.subprocess.Process, head: bytes, body: AsyncIterator[bytes]):
+        try:
+            process.stdin.write(head)
+            await process.stdin.drain()
+            async for chunk in body:
+                if not chunk:
+                    continue
+                self._count_bytes(len(chunk))
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg exited early; its stderr tail explains why
+        finally:
+            process.stdin.close()
+
+    def _count_bytes(self, size: int):
+        self.bytes_received += size
+        if self.max_bytes and self.bytes_received > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes / (1024 * 1024):.0f}MB")
+        # Checked per chunk, so at most one segment past the limit is ever written
+        if self.max_disk_bytes and self.disk_bytes > self.max_disk_bytes:
+            raise StorageQuotaExceeded(
+                f"Processing this upload needs more than the {self.max_disk_bytes / (1024 * 1024):.0f}MB "
+                f"of temporary storage reserved for it"
+            )
+
+    async def _read_frames(self, process: asyncio.subprocess.Process):
+        # stdout stays empty when there is no video output
+        parser = MjpegStreamParser()
+        while True:
+            data = await process.stdout.read(65536)
+            if not data:
+                break
+            for image in parser.feed(data):
+                self._add_frame(image)
+
+    async def _read_stderr(self, process: asyncio.subprocess.Process):
+        async for line in read_lines(process.stderr):
+            self.stderr_tail.append(line)
+            if re.search(SHOWINFO_PATTERN, line):
+                self.frame_times.extend(VideoProcessor.parse_frame_times(line))
+
+    def _add_frame(self, image: bytes):
+        self.frames_seen += 1
+        index = self.frames_seen - 1
+        if index % self.frame_stride:
+            return
+        self.frames.append({
+            "data": image,
+            "timestamp": None,  # resolved from showinfo when the frames are dispatched
+            "number": self.frames_seen,
+            "session_id": self.session_id,
+            "mime_type": "image/jpeg"
+        })
+        if len(self.frames) > self.max_frames:
+            # The video is longer than the budget covers: halve the sampling rate
+            self.frame_stride *= 2
+            self.frames = [f for f in self.frames if (f["number"] - 1) % self.frame_stride == 0]
+
+    def _dispatch_frames(self):
+        """Deduplicate the kept frames and start their vision batches"""
+        for frame in self.frames:
+            index = frame["number"] - 1
+            # Every showinfo line has been read by now; fall back to the nominal sample time
+            frame["timestamp"] = (self.frame_times[index] if index < len(self.frame_times)
+                                  else round(index * self.frame_interval, 3))
+        unique, self.duplicates = self.deduplicator.deduplicate(self.frames)
+        self.frames_sent = len(unique)
+        for i in range(0, len(unique), self.batch_size):
+            self.vision_tasks.append(asyncio.create_task(self.analyze_frames(unique[i:i + self.batch_size])))
+
+    async def _watch_segments(self):
+        while True:
+            self._start_new_segments()
+            if self.finished.is_set():
+                return
+            try:
+                await asyncio.wait_for(self.finished.wait(), self.segment_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start_new_segments(self):
+        """Start transcribing every segment the segment list reports as complete"""
+        try:
+            with open(self.segment_list) as f:
+                lines = f.read().split("\n")[:-1]  # the last piece may be a partial line
+        except FileNotFoundError:
+            return
+        for line in lines[len(self.segments):]:
+            name, start, end = line.rsplit(",", 2)
+            segment = {
+                "path": os.path.join(self.output_dir, name),
+                "index": len(self.segments),
+                "start": round(float(start), 3),
+                "end": round(float(end), 3)
+            }
+            self.segments.append(segment)
+            try:
+                self.disk_bytes += os.path.getsize(segment["path"])
+            except OSError:
+                pass
+            self.segment_tasks.append(asyncio.create_task(self.transcribe_segment(segment)))
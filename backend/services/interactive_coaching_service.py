@@ -1,11 +1,11 @@
-import openai
+from services.clients import get_openai_client
 import json
 from typing import Dict, Any, Optional, List
 import re
 
 class InteractiveCoachingService:
     def __init__(self, openai_key: Optional[str] = None):
-        self.client = openai.OpenAI(api_key=openai_key) if openai_key and openai_key != "your_openai_api_key_here" else None
+        self.client = get_openai_client(openai_key)
 
     async def generate_interactive_scenarios(self, transcript: str, context: str, coaching_insights: Dict = None) -> Dict[str, Any]:
         """Generate interactive coaching scenarios based on context"""
@@ -73,7 +73,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "Extract clear Q&A pairs from interview transcripts. Return valid JSON array."},
@@ -128,7 +128,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "Generate thoughtful questions that test conceptual understanding. Return valid JSON."},
@@ -184,7 +184,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are an encouraging interview coach. Provide constructive, specific feedback that helps users improve."},
@@ -221,7 +221,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a patient teacher. Provide clear explanations that build understanding."},
@@ -277,7 +277,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a friendly, encouraging interview coach. Speak naturally and conversationally."},
@@ -322,7 +322,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a patient, encouraging tutor. Speak naturally and make learning engaging."},
@@ -365,7 +365,7 @@ class InteractiveCoachingService:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a friendly networking coach. Keep it casual and conversational."},
@@ -441,7 +441,7 @@ Your role:
 Be friendly and casual, like chatting with a mentor."""
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -0,0 +1,193 @@
+import re
+import json
+import asyncio
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from services.cache import JsonDiskCache, hash_file, make_cache_key
+from services.process_runner import ProcessRunner, get_process_runner
+
+# Bump when the probed fields change so cached entries are re-probed
+PROBE_VERSION = 2
+
+# ffmpeg progress lines: "... time=00:01:23.45 bitrate=..."
+PROGRESS_TIME_PATTERN = r"time=\s*(\d+):(\d+):([\d.]+)"
+
+
+class MediaProbeError(Exception):
+    """Raised when ffprobe cannot read a file"""
+
+
+@dataclass
+class StreamInfo:
+    index: int
+    codec_type: str            # "audio", "video", "subtitle", ...
+    codec_name: str = ""
+    bit_rate: int = 0          # bits/s, 0 if the container does not say
+    width: int = 0
+    height: int = 0
+    frame_rate: float = 0.0
+    sample_rate: int = 0
+    channels: int = 0
+    attached_pic: bool = False  # cover art (e.g. in MP3/M4A), not a real video track
+
+
+@dataclass
+class MediaInfo:
+    """Everything the upload pipeline routes on, from one ffprobe call"""
+    duration: float
+    start_time: float = 0.0
+    format_name: str = ""
+    streams: List[StreamInfo] = field(default_factory=list)
+    content_hash: str = ""
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.codec_type == "video" and not s.attached_pic), None)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        return next((s for s in self.streams if s.codec_type == "audio"), None)
+
+    @property
+    def has_video(self) -> bool:
+        return self.video is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    @property
+    def resolution(self) -> str:
+        return f"{self.video.width}x{self.video.height}" if self.video else ""
+
+    def describe(self) -> str:
+        parts = [f"{self.duration:.1f}s", self.format_name]
+        if self.video:
+            parts.append(f"video {self.video.codec_name} {self.resolution} @ {self.video.frame_rate:.2f}fps")
+        if self.audio:
+            parts.append(f"audio {self.audio.codec_name} {self.audio.bit_rate // 1000}kbps")
+        return ", ".join(p for p in parts if p)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaInfo":
+        streams = [StreamInfo(**s) for s in data.get("streams", [])]
+        return cls(**{**data, "streams": streams})
+
+
+def _number(value: Any, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return kind(0)
+
+
+def _frame_rate(value: Optional[str]) -> float:
+    """ffprobe rates are fractions like "30000/1001" ("0/0" when unknown)"""
+    numerator, _, denominator = (value or "0/0").partition("/")
+    denominator = _number(denominator or 1)
+    return round(_number(numerator) / denominator, 3) if denominator else 0.0
+
+
+class MediaProber:
+    """
+    Reads duration, container and per-stream metadata with a single ffprobe call
+
+    Results are cached by file content hash, so re-uploads of the same recording (and
+    repeated probes within one request) never run ffprobe again.
+    """
+
+    def __init__(self, cache: Optional[JsonDiskCache] = None, runner: Optional[ProcessRunner] = None):
+        self.cache = cache
+        self.runner = runner or get_process_runner()
+
+    async def probe(self, path: str, content_hash: Optional[str] = None) -> MediaInfo:
+        """
+        Probe a media file on disk
+
+        Raises:
+            MediaProbeError if ffprobe fails or finds no streams
+        """
+        content_hash = content_hash or await asyncio.to_thread(hash_file, path)
+        cache_key = make_cache_key("probe", content_hash, PROBE_VERSION)
+        cached = await self.cache.get_async(cache_key) if self.cache else None
+        if cached:
+            return MediaInfo.from_dict(cached)
+
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries",
+            "format=duration,start_time,format_name"
+            ":stream=index,codec_type,codec_name,bit_rate,width,height,avg_frame_rate,sample_rate,channels"
+            ":stream_disposition=attached_pic",
+            "-of", "json",
+            path
+        ]
+        result = await self.runner.run(cmd, timeout=10)
+        if result.returncode != 0:
+            raise MediaProbeError(f"Could not read media file: {result.stderr_tail}")
+        try:
+            probe = json.loads(result.stdout or b"{}")
+        except ValueError:
+            raise MediaProbeError("Could not parse ffprobe output")
+
+        info = self.parse(probe, content_hash)
+        if not info.streams:
+            raise MediaProbeError("File contains no audio or video streams")
+        if info.duration <= 0:
+            # e.g. MediaRecorder WebM, which is written without a container duration
+            info.duration = await self.measure_duration(path)
+        if self.cache:
+            await self.cache.set_async(cache_key, info.to_dict())
+        print(f"🔎 Probed {path}: {info.describe()}")
+        return info
+
+    async def measure_duration(self, path: str) -> float:
+        """
+        Duration found by demuxing the whole file (stream copy to the null muxer, no
+        decoding) and reading ffmpeg's last progress time; 0.0 if that fails too
+        """
+        cmd = ["ffmpeg", "-nostdin", "-i", path, "-map", "0", "-c", "copy", "-f", "null", "-"]
+        try:
+            result = await self.runner.run(cmd, timeout=60, stderr_pattern=PROGRESS_TIME_PATTERN, capture_stdout=False)
+        except Exception as e:
+            print(f"⚠️ Could not measure duration of {path}: {e}")
+            return 0.0
+        times = re.findall(PROGRESS_TIME_PATTERN, result.matched_stderr)
+        if result.returncode != 0 or not times:
+            return 0.0
+        hours, minutes, seconds = times[-1]
+        duration = round(int(hours) * 3600 + int(minutes) * 60 + float(seconds), 3)
+        print(f"⏱️ No container duration in {path} - measured {duration:.1f}s")
+        return duration
+
+    @staticmethod
+    def parse(probe: Dict[str, Any], content_hash: str = "") -> MediaInfo:
+        """Build a MediaInfo from ffprobe's JSON output"""
+        fmt = probe.get("format", {})
+        streams = [
+            StreamInfo(
+                index=_number(s.get("index"), int),
+                codec_type=s.get("codec_type", ""),
+                codec_name=s.get("codec_name", ""),
+                bit_rate=_number(s.get("bit_rate"), int),
+                width=_number(s.get("width"), int),
+                height=_number(s.get("height"), int),
+                frame_rate=_frame_rate(s.get("avg_frame_rate")),
+                sample_rate=_number(s.get("sample_rate"), int),
+                channels=_number(s.get("channels"), int),
+                attached_pic=bool(s.get("disposition", {}).get("attached_pic"))
+            )
+            for s in probe.get("streams", [])
+        ]
+        return MediaInfo(
+            duration=_number(fmt.get("duration")),
+            start_time=_number(fmt.get("start_time")),
+            format_name=fmt.get("format_name", ""),
+            streams=streams,
+            content_hash=content_hash
+        )
@@ -0,0 +1,85 @@
+from typing import List
+
+SOI = b"\xff\xd8"
+
+
+class MjpegStreamParser:
+    """
+    Splits a concatenated JPEG stream (ffmpeg -f image2pipe -c:v mjpeg pipe:1) into
+    one bytes object per frame
+
+    Walks the marker segments up to each scan, then scans entropy-coded data for the
+    EOI marker (0xFFD9), skipping stuffed bytes (FF00) and restart markers, so
+    0xFFD9 bytes inside headers are never mistaken for the end of a frame. Parsing
+    resumes where it stopped, so feeding small chunks stays linear.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0          # next byte to inspect within the current frame
+        self.in_scan = False       # inside entropy-coded data (after SOS)
+
+    def feed(self, data: bytes) -> List[bytes]:
+        """Add stream bytes and return every frame completed by them"""
+        self.buffer.extend(data)
+        frames = []
+        while True:
+            end = self._find_frame_end()
+            if end is None:
+                return frames
+            frames.append(bytes(self.buffer[:end]))
+            del self.buffer[:end]
+            self.position = 0
+            self.in_scan = False
+
+    def _find_frame_end(self):
+        buf = self.buffer
+        if self.position == 0:
+            start = buf.find(SOI)
+            if start < 0:
+                # Keep a trailing 0xFF in case it is the first half of the next SOI
+                del buf[:max(0, len(buf) - 1)]
+                return None
+            del buf[:start]
+            self.position = 2
+
+        i = self.position
+        while True:
+            if self.in_scan:
+                j = buf.find(b"\xff", i)
+                if j < 0 or j + 1 >= len(buf):
+                    self.position = max(i, len(buf) - 1)
+                    return None
+                marker = buf[j + 1]
+                if marker == 0x00 or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                    i = j + 1
+                    continue
+                # A real marker: EOI, or the next segment of a progressive JPEG
+                self.in_scan = False
+                i = j
+                continue
+
+            if i + 2 > len(buf):
+                self.position = i
+                return None
+            if buf[i] != 0xFF:
+                # Not a marker where one must be - drop this SOI and resynchronise
+                del buf[:2]
+                self.position = 0
+                return self._find_frame_end()
+            marker = buf[i + 1]
+            if marker == 0xFF:
+                i += 1  # fill byte
+                continue
+            if marker == 0xD9:
+                return i + 2
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                i += 2  # standalone markers have no length
+                continue
+            if i + 4 > len(buf):
+                self.position = i
+                return None
+            length = (buf[i + 2] << 8) | buf[i + 3]
+            i += 2 + length
+            if marker == 0xDA:
+                self.in_scan = True  # SOS header done; compressed data follows
@@ -0,0 +1,185 @@
+import os
+import re
+import codecs
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Sequence
+
+# Shared runner for ffmpeg/ffprobe.
+# Processes run without blocking the event loop, are killed when the awaiting task is
+# cancelled (client disconnect, deadline) and are capped per worker so a burst of
+# uploads cannot start more decoders than there are cores. Processes fed by a client
+# upload (open()) run as fast as that client sends, so they have a cap of their own
+# and slow uploaders cannot hold the slots decodes and probes need.
+
+FFMPEG_INSTALL_HINT = "Install with: brew install ffmpeg (macOS) or apt install ffmpeg (Linux)"
+
+
+class ProcessTimeout(Exception):
+    """Raised when a process exceeds its deadline (it has already been killed)"""
+
+
+class ProcessResult:
+    """Exit status, stdout bytes and the interesting part of stderr"""
+
+    def __init__(self, returncode: int, stdout: bytes, stderr_lines: List[str], stderr_tail: str):
+        self.returncode = returncode
+        self.stdout = stdout
+        # Lines matching the caller's stderr_pattern, in order (e.g. showinfo, silencedetect)
+        self.stderr_lines = stderr_lines
+        # Last few stderr lines, for error messages
+        self.stderr_tail = stderr_tail
+
+    @property
+    def matched_stderr(self) -> str:
+        return "\n".join(self.stderr_lines)
+
+
+async def read_lines(stream: asyncio.StreamReader) -> AsyncIterator[str]:
+    """Yield the non-empty lines of a process's text output as they arrive"""
+    pending = ""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = await stream.read(65536)
+        if not data:
+            break
+        # ffmpeg ends progress lines with \r, so split on both
+        lines = re.split(r"[\r\n]", pending + decoder.decode(data))
+        pending = lines.pop()
+        for line in lines:
+            if line:
+                yield line
+    if pending:
+        yield pending
+
+
+class ProcessRunner:
+    def __init__(self, max_processes: int = 4, max_streams: int = 4, stderr_tail_lines: int = 20):
+        self.max_processes = max_processes
+        self.max_streams = max_streams
+        self.stderr_tail_lines = stderr_tail_lines
+        self.semaphore = asyncio.Semaphore(max_processes)
+        self.stream_slots = asyncio.Semaphore(max_streams)
+        self.running = 0
+
+    async def run(
+        self,
+        cmd: Sequence[str],
+        timeout: Optional[float] = 300.0,
+        stderr_pattern: Optional[str] = None,
+        capture_stdout: bool = True
+    ) -> ProcessResult:
+        """
+        Run cmd to completion and return its ProcessResult
+
+        stderr is read incrementally: only lines matching stderr_pattern and a short
+        tail are kept, never the whole (often megabytes of) ffmpeg log.
+        """
+        # The deadline covers waiting for a slot too, so short probes never queue
+        # indefinitely behind long decodes
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise ProcessTimeout(f"{os.path.basename(cmd[0])} waited over {timeout:g}s for a free process slot")
+        try:
+            remaining = None if timeout is None else max(0.0, timeout - (loop.time() - started))
+            return await self._execute(cmd, timeout, remaining, stderr_pattern, capture_stdout)
+        finally:
+            self.semaphore.release()
+
+    async def _execute(
+        self,
+        cmd: Sequence[str],
+        timeout: Optional[float],
+        remaining: Optional[float],
+        stderr_pattern: Optional[str],
+        capture_stdout: bool
+    ) -> ProcessResult:
+        """Start cmd and collect its output, killing it once remaining seconds have passed"""
+        pattern = re.compile(stderr_pattern) if stderr_pattern else None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            raise Exception(f"{cmd[0]} not found. {FFMPEG_INSTALL_HINT}")
+
+        self.running += 1
+        matched: List[str] = []
+        tail: deque = deque(maxlen=self.stderr_tail_lines)
+
+        async def read_stderr():
+            async for line in read_lines(process.stderr):
+                tail.append(line)
+                if pattern and pattern.search(line):
+                    matched.append(line)
+
+        async def read_stdout() -> bytes:
+            return await process.stdout.read() if capture_stdout else b""
+
+        readers = asyncio.gather(read_stdout(), read_stderr())
+        try:
+            stdout, _ = await asyncio.wait_for(readers, remaining)
+            returncode = await process.wait()
+        except asyncio.TimeoutError:
+            raise ProcessTimeout(f"{os.path.basename(cmd[0])} timed out after {timeout:g}s")
+        finally:
+            self.running -= 1
+            if process.returncode is None:
+                # Cancelled or timed out - don't leave the decoder running
+                process.kill()
+                await process.wait()
+            await asyncio.gather(readers, return_exceptions=True)
+
+        return ProcessResult(returncode, stdout, matched, "\n".join(tail))
+
+    @asynccontextmanager
+    async def open(self, cmd: Sequence[str]) -> AsyncIterator[asyncio.subprocess.Process]:
+        """
+        Start cmd with stdin, stdout and stderr pipes for callers that stream through it
+        
+        Counts against the max_streams cap, not run()'s; the process is killed on exit
+        if it is still running. The caller must drain stdout and stderr.
+        """
+        async with self.stream_slots:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                raise Exception(f"{cmd[0]} not found. {FFMPEG_INSTALL_HINT}")
+
+            self.running += 1
+            try:
+                yield process
+            finally:
+                self.running -= 1
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+
+_runner: Optional[ProcessRunner] = None
+
+
+def get_process_runner() -> ProcessRunner:
+    """
+    Return the shared runner: FFMPEG_MAX_PROCESSES concurrent processes (default: CPU
+    count) plus FFMPEG_MAX_STREAMS upload-fed ones (default: 4)
+    """
+    global _runner
+    if _runner is None:
+        _runner = ProcessRunner(
+            max_processes=int(os.getenv("FFMPEG_MAX_PROCESSES") or os.cpu_count() or 4),
+            max_streams=int(os.getenv("FFMPEG_MAX_STREAMS", "4"))
+        )
+    return _runner
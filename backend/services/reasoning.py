@@ -1,11 +1,11 @@
-import openai
+from services.clients import get_openai_client
 import json
 from typing import Dict, List, Any, Optional
 
 class ReasoningService:
     def __init__(self, openai_key: Optional[str] = None):
         self.openai_key = openai_key
-        self.openai_client = openai.OpenAI(api_key=openai_key) if openai_key and openai_key != "your_openai_api_key_here" else None
+        self.openai_client = get_openai_client(openai_key)
     
     async def clean_transcript(self, raw_transcript: str) -> Dict:
         """Clean and segment transcript using GPT-4o"""
@@ -30,7 +30,7 @@ Raw transcript:
 {raw_transcript}
 ```"""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a precise text normalization assistant. Remove filler words, label speakers when indicated, and split long transcripts into logical segments. Return only valid JSON."},
@@ -82,7 +82,7 @@ Timezone: {timezone}
 Here is the input:
 {json.dumps(sections, indent=2)}"""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are an exacting task extraction engine. Produce only JSON that conforms to the schema. Attempt to resolve natural-language dates into ISO 8601 where possible. If no explicit date is present, set \"due\": null and \"date_hint\": \"<text hint>\". Add a \"confidence\" (0.0–1.0). Return JSON with structure: {\"tasks\": [{id, action, context, due, date_hint, owner, priority, confidence, source_section}]}"},
@@ -116,7 +116,7 @@ Tasks:
 
 Return only JSON."""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a scheduling assistant. Use user's locale/timezone when resolving dates. When the task has an explicit ISO due, schedule a reasonable calendar event time (e.g., 30–60 minutes). Return only valid JSON."},
@@ -138,7 +138,7 @@ Example task:
 
 Return only the question text, no JSON."""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a concise clarification assistant. Generate a single clear question asking only what is missing (date, owner, or ambiguity)."},
@@ -204,7 +204,7 @@ Provide JSON:
 Sections: {json.dumps(sections, indent=2)}
 Tasks: {json.dumps(tasks, indent=2)}"""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o-mini",  # Faster model for speed
             messages=[
                 {"role": "system", "content": "Create adaptive summaries. Scale detail with content length. Capture both strengths and gaps. Return valid JSON."},
@@ -240,7 +240,7 @@ Task: produce a 1–2 sentence spoken summary confirming created events and offe
 
 Return only the single text string."""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a friendly productivity assistant named EVE. Keep the voice concise (1–2 sentences), confirm actions taken, and politely ask if further help is needed."},
@@ -264,7 +264,7 @@ Return JSON: {{"flashcards": [...], "quiz": [...]}}
 Transcript:
 {transcript}"""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "Produce high-quality flashcards from educational content. Return only valid JSON."},
@@ -290,7 +290,7 @@ Return JSON: {{"interruptions": int, "avg_speaking_seconds": {{"Speaker A":45}},
 Transcript:
 {transcript}"""
 
-        response = self.openai_client.chat.completions.create(
+        response = await self.openai_client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {"role": "system", "content": "You are a communication coach. Provide objective metrics and concise suggestions. Return only valid JSON."},
@@ -0,0 +1,316 @@
+import asyncio
+import io
+import re
+import time
+import uuid
+import wave
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2  # 16-bit mono PCM
+
+CaptionCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+WindowTranscriber = Callable[[bytes], Awaitable[Optional[str]]]
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Wrap raw 16-bit mono PCM in a WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def merge_overlapping_words(previous_tail: List[str], words: List[str], max_overlap: int = 8) -> List[str]:
+    """
+    Drop the words at the start of a window that repeat the end of the previous window
+
+    Windows overlap slightly so words are not cut in half at the seam; Whisper then
+    transcribes the overlapping audio twice. The longest suffix/prefix match wins.
+    """
+    prev = [_normalize_word(w) for w in previous_tail]
+    curr = [_normalize_word(w) for w in words]
+    for k in range(min(max_overlap, len(prev), len(curr)), 0, -1):
+        if prev[-k:] == curr[:k]:
+            return words[k:]
+    return words
+
+
+class StreamSession:
+    """
+    One live recording: decodes its own container stream to PCM with ffmpeg, gates it
+    with voice-activity detection and transcribes speech windows in order
+
+    Silent audio is dropped before it reaches Whisper. A window is flushed as soon as
+    an utterance ends (hangover of trailing silence) or when it reaches
+    window_seconds, in which case the next window overlaps it slightly.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        transcribe: WindowTranscriber,
+        on_caption: CaptionCallback,
+        window_seconds: float = 5.0,
+        overlap_seconds: float = 0.5,
+        preroll_seconds: float = 0.3,
+        hangover_seconds: float = 0.6,
+        min_speech_seconds: float = 0.25
+    ):
+        self.session_id = session_id
+        self.transcribe = transcribe
+        self.on_caption = on_caption
+        self.vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+        self.window_bytes = int(window_seconds * SAMPLE_RATE) * 2
+        self.overlap_bytes = int(overlap_seconds * SAMPLE_RATE) * 2
+        self.preroll_bytes = int(preroll_seconds * SAMPLE_RATE) * 2
+        self.min_speech_bytes = int(min_speech_seconds * SAMPLE_RATE) * 2
+        self.hangover_frames = max(1, round(hangover_seconds / self.vad.frame_seconds))
+
+        self.pcm = bytearray()
+        self.pcm_offset = 0         # absolute byte position of self.pcm[0]
+        self.vad_position = 0       # absolute byte position of the next frame to classify
+        self.next_window_start = 0  # absolute byte position where un-transcribed audio begins
+        self.utterance_start: Optional[int] = None
+        self.speech_bytes = 0
+        self.silence_frames = 0
+        self.previous_words: List[str] = []
+        self.last_active = time.monotonic()
+
+        self.windows_sent = 0
+        self.skipped_bytes = 0
+
+        self.windows: asyncio.Queue = asyncio.Queue()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.reader_task: Optional[asyncio.Task] = None
+        self.worker_task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    async def start(self):
+        """Start the per-session ffmpeg decoder and window workers"""
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                "ffmpeg",
+                "-loglevel", "error",
+                "-i", "pipe:0",
+                "-vn",
+                "-ac", "1",
+                "-ar", str(SAMPLE_RATE),
+                "-f", "s16le",
+                "pipe:1",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            raise Exception("ffmpeg not found. Install with: brew install ffmpeg (macOS) or apt install ffmpeg (Linux)")
+        self.reader_task = asyncio.create_task(self._read_pcm())
+        self.worker_task = asyncio.create_task(self._transcribe_windows())
+
+    async def feed(self, chunk: bytes):
+        """Push a chunk of the recorder's container stream (e.g. MediaRecorder webm)"""
+        if self.closed or not self.process or self.process.stdin.is_closing():
+            return
+        self.last_active = time.monotonic()
+        self.process.stdin.write(chunk)
+        await self.process.stdin.drain()
+
+    async def _read_pcm(self):
+        while True:
+            data = await self.process.stdout.read(8192)
+            if not data:
+                break
+            self.pcm.extend(data)
+            self._process_audio(final=False)
+        self._process_audio(final=True)
+        print(f"[STREAM] Session {self.session_id}: {self.windows_sent} windows sent, "
+              f"{self.skipped_bytes / BYTES_PER_SECOND:.1f}s of silence skipped")
+        await self.windows.put(None)
+
+    def _process_audio(self, final: bool):
+        """Run VAD over newly decoded frames and queue speech windows"""
+        frame_bytes = self.vad.frame_bytes
+        end = self.pcm_offset + len(self.pcm)
+        n_frames = (end - self.vad_position) // frame_bytes
+
+        if n_frames:
+            start = self.vad_position - self.pcm_offset
+            flags = self.vad.classify(bytes(self.pcm[start:start + n_frames * frame_bytes]))
+            for voiced in flags:
+                frame_start = self.vad_position
+                frame_end = frame_start + frame_bytes
+                self.vad_position = frame_end
+
+                if voiced:
+                    if self.utterance_start is None:
+                        self.utterance_start = max(self.pcm_offset, self.next_window_start, frame_start - self.preroll_bytes)
+                        self.speech_bytes = 0
+                    self.speech_bytes += frame_bytes
+                    self.silence_frames = 0
+                elif self.utterance_start is not None:
+                    self.silence_frames += 1
+                    if self.silence_frames >= self.hangover_frames:
+                        # End of utterance: flush now instead of waiting for a full window
+                        self._end_utterance(frame_end)
+                        continue
+                else:
+                    self.skipped_bytes += frame_bytes
+
+                if self.utterance_start is not None and frame_end - self.utterance_start >= self.window_bytes:
+                    # Long utterance: cut here and continue with an overlapping window
+                    self._queue_window(self.utterance_start, frame_end)
+                    self.utterance_start = frame_end - self.overlap_bytes
+                    self.speech_bytes = 0
+
+        if final and self.utterance_start is not None:
+            self._end_utterance(end - (end - self.utterance_start) % 2)
+
+        # Drop audio that can no longer be part of a window
+        keep_from = self.vad_position - self.preroll_bytes
+        if self.utterance_start is not None:
+            keep_from = min(keep_from, self.utterance_start)
+        keep_from = max(self.pcm_offset, keep_from)
+        del self.pcm[:keep_from - self.pcm_offset]
+        self.pcm_offset = keep_from
+
+    def _end_utterance(self, end: int):
+        if self.speech_bytes >= self.min_speech_bytes:
+            self._queue_window(self.utterance_start, end)
+        else:
+            # Too little speech to be worth a Whisper call (clicks, coughs)
+            self.skipped_bytes += end - self.utterance_start
+        self.next_window_start = max(self.next_window_start, end)
+        self.utterance_start = None
+        self.speech_bytes = 0
+        self.silence_frames = 0
+
+    def _queue_window(self, start: int, end: int):
+        segment = bytes(self.pcm[start - self.pcm_offset:end - self.pcm_offset])
+        self.windows.put_nowait({
+            "wav": pcm_to_wav(segment),
+            "start": start / BYTES_PER_SECOND,
+            "end": end / BYTES_PER_SECOND
+        })
+        self.next_window_start = end
+        self.windows_sent += 1
+
+    async def _transcribe_windows(self):
+        while True:
+            window = await self.windows.get()
+            if window is None:
+                break
+            text = await self.transcribe(window["wav"])
+            if not text:
+                continue
+            words = merge_overlapping_words(self.previous_words, text.split())
+            self.previous_words = (self.previous_words + words)[-16:]
+            if not words:
+                continue
+            try:
+                await self.on_caption({
+                    "session_id": self.session_id,
+                    "text": " ".join(words),
+                    "start": round(window["start"], 2),
+                    "end": round(window["end"], 2)
+                })
+            except Exception as e:
+                print(f"[STREAM] Failed to deliver caption for {self.session_id}: {e}")
+
+    async def finish(self):
+        """Stop accepting audio, transcribe what is buffered and wait for the last caption"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.process and not self.process.stdin.is_closing():
+            self.process.stdin.close()
+        await asyncio.gather(self.reader_task, self.worker_task, return_exceptions=True)
+        if self.process:
+            await self.process.wait()
+
+    async def close(self):
+        """Drop buffered audio and stop immediately"""
+        self.closed = True
+        for task in (self.reader_task, self.worker_task):
+            if task and not task.done():
+                task.cancel()
+        if self.process and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+
+class StreamTranscriptionManager:
+    """Keeps one StreamSession per live recorder and evicts idle ones"""
+
+    def __init__(
+        self,
+        transcribe: WindowTranscriber,
+        max_sessions: int = 100,
+        idle_timeout_seconds: float = 60.0
+    ):
+        self.transcribe = transcribe
+        self.max_sessions = max_sessions
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.sessions: Dict[str, StreamSession] = {}
+
+    async def open_session(self, on_caption: CaptionCallback, session_id: Optional[str] = None) -> StreamSession:
+        """Create a session, or re-attach a reconnecting client to its existing one"""
+        if session_id and session_id in self.sessions:
+            session = self.sessions[session_id]
+            session.on_caption = on_caption
+            session.last_active = time.monotonic()
+            return session
+
+        if len(self.sessions) >= self.max_sessions:
+            await self.evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise Exception(f"Too many live transcription sessions (max {self.max_sessions})")
+
+        session = StreamSession(session_id or str(uuid.uuid4()), self.transcribe, on_caption)
+        await session.start()
+        self.sessions[session.session_id] = session
+        print(f"[STREAM] Opened session {session.session_id} ({len(self.sessions)} active)")
+        return session
+
+    def get_session(self, session_id: str) -> Optional[StreamSession]:
+        return self.sessions.get(session_id)
+
+    async def close_session(self, session_id: str, flush: bool = True):
+        """Close a session; with flush=True the buffered tail is transcribed first"""
+        session = self.sessions.pop(session_id, None)
+        if not session:
+            return
+        if flush:
+            await session.finish()
+        else:
+            await session.close()
+        print(f"[STREAM] Closed session {session_id} ({len(self.sessions)} active)")
+
+    async def evict_idle(self):
+        """Close sessions that have not received audio within idle_timeout_seconds"""
+        now = time.monotonic()
+        idle = [sid for sid, s in self.sessions.items() if now - s.last_active > self.idle_timeout_seconds]
+        for session_id in idle:
+            print(f"[STREAM] Evicting idle session {session_id}")
+            await self.close_session(session_id, flush=False)
+
+    async def run_janitor(self, interval_seconds: float = 15.0):
+        """Background loop that evicts idle sessions"""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                print(f"[STREAM] Janitor error: {e}")
+
+    async def close_all(self):
+        for session_id in list(self.sessions):
+            await self.close_session(session_id, flush=False)
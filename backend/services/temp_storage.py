@@ -0,0 +1,193 @@
+import os
+import time
+import uuid
+import shutil
+import asyncio
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+
+class StorageQuotaExceeded(Exception):
+    """Raised when temp storage is full and a new session cannot be admitted"""
+
+
+def path_size(path: str) -> int:
+    """Bytes used by a file, or by every file under a directory (0 if it is gone)"""
+    try:
+        if os.path.isdir(path):
+            return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def remove_path(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class TempSession:
+    """The temp files and directories one request owns"""
+
+    def __init__(self, reserved_bytes: int = 0):
+        self.session_id = str(uuid.uuid4())
+        self.reserved_bytes = reserved_bytes
+        self.paths: Set[str] = set()
+        self.created = time.time()
+        self.measured_bytes = 0  # last size seen by TempStorageManager.measure
+
+    def track(self, path: str) -> str:
+        """Register a file or directory to be deleted when the session is released"""
+        self.paths.add(os.path.abspath(path))
+        return path
+
+    @property
+    def bytes(self) -> int:
+        """Walks the tracked paths on disk - call it off the event loop"""
+        return sum(path_size(p) for p in list(self.paths))
+
+    @property
+    def accounted_bytes(self) -> int:
+        """What the session counts against the quota: its reservation until it writes more"""
+        return max(self.reserved_bytes, self.measured_bytes)
+
+
+class TempStorageManager:
+    """
+    Bounds the disk used under one temp root (uploads, extracted audio, frames, chunks)
+
+    Each request takes a TempSession sized by the bytes it expects to write. While the
+    quota is used up, new sessions wait for others to be released ("queue") for up to
+    queue_timeout_seconds, or are refused at once ("reject"). Releasing a session
+    deletes everything it tracked. A background janitor removes entries under the root
+    that no live session owns once they are older than max_age_seconds - leftovers of
+    crashes, timeouts and reloads - and counts the untracked rest against the quota.
+    Session sizes are measured on a worker thread (at each acquire and janitor pass),
+    so checking the quota never walks the disk on the event loop.
+    """
+
+    def __init__(
+        self,
+        root: str = "/tmp/eve_video",
+        quota_bytes: int = 4 * 1024 * 1024 * 1024,
+        policy: str = "queue",
+        queue_timeout_seconds: float = 60.0,
+        max_age_seconds: float = 3600.0
+    ):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.policy = policy
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.max_age_seconds = max_age_seconds
+        self.sessions: Dict[str, TempSession] = {}
+        self.untracked_bytes = 0
+        self.condition = asyncio.Condition()
+        Path(root).mkdir(parents=True, exist_ok=True)
+
+    def usage(self) -> int:
+        """Bytes counted against the quota: live sessions plus untracked files seen by the janitor"""
+        return self.untracked_bytes + sum(s.accounted_bytes for s in self.sessions.values())
+
+    @staticmethod
+    def measure(sessions: List[TempSession]):
+        """Refresh measured_bytes of each session (blocking disk walk)"""
+        for session in sessions:
+            session.measured_bytes = session.bytes
+
+    def _fits(self, expected_bytes: int) -> bool:
+        # A session larger than the whole quota may still run when nothing else does
+        return not self.sessions or self.usage() + expected_bytes <= self.quota_bytes
+
+    async def acquire(self, expected_bytes: int = 0) -> TempSession:
+        """Admit a new session, waiting or raising StorageQuotaExceeded when storage is full"""
+        await asyncio.to_thread(self.measure, list(self.sessions.values()))
+        async with self.condition:
+            if not self._fits(expected_bytes):
+                if self.policy != "queue":
+                    raise StorageQuotaExceeded(self._full_message())
+                print(f"⏳ Temp storage full ({self.usage() / (1024 * 1024):.0f}MB used) - queueing")
+                try:
+                    await asyncio.wait_for(
+                        self.condition.wait_for(lambda: self._fits(expected_bytes)),
+                        self.queue_timeout_seconds
+                    )
+                except asyncio.TimeoutError:
+                    raise StorageQuotaExceeded(self._full_message())
+            session = TempSession(expected_bytes)
+            self.sessions[session.session_id] = session
+            return session
+
+    async def release(self, session: TempSession):
+        """Delete the session's files and let queued sessions in"""
+        used = await asyncio.to_thread(self._remove, session)
+        async with self.condition:
+            self.sessions.pop(session.session_id, None)
+            self.condition.notify_all()
+        if used:
+            print(f"🧹 Released temp session {session.session_id[:8]} ({used / (1024 * 1024):.2f}MB)")
+
+    @staticmethod
+    def _remove(session: TempSession) -> int:
+        used = session.bytes
+        for path in list(session.paths):
+            remove_path(path)
+        return used
+
+    @asynccontextmanager
+    async def session(self, expected_bytes: int = 0) -> AsyncIterator[TempSession]:
+        session = await self.acquire(expected_bytes)
+        try:
+            yield session
+        finally:
+            await self.release(session)
+
+    def _full_message(self) -> str:
+        return (f"Temporary storage is full ({self.usage() / (1024 * 1024):.0f}MB of "
+                f"{self.quota_bytes / (1024 * 1024):.0f}MB in use). Try again shortly.")
+
+    def owned_paths(self) -> Set[str]:
+        return {p for s in self.sessions.values() for p in s.paths}
+
+    def sweep(self, owned: Optional[Set[str]] = None) -> int:
+        """Remove stale untracked entries under the root; returns how many were removed"""
+        owned = self.owned_paths() if owned is None else owned
+        cutoff = time.time() - self.max_age_seconds
+        removed = 0
+        untracked = 0
+        for entry in os.scandir(self.root):
+            path = os.path.abspath(entry.path)
+            if path in owned:
+                continue
+            try:
+                modified = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            if modified < cutoff:
+                remove_path(path)
+                removed += 1
+            else:
+                # In use by work that does not track its files (e.g. transcription chunks)
+                untracked += path_size(path)
+        self.untracked_bytes = untracked
+        if removed:
+            print(f"🧹 Temp janitor removed {removed} stale entries from {self.root}")
+        return removed
+
+    async def run_janitor(self, interval_seconds: float = 300.0):
+        """Background loop that sweeps stale temp files (first sweep at startup)"""
+        while True:
+            try:
+                # Snapshot live sessions on the loop thread; the scans themselves run off it
+                await asyncio.to_thread(self.sweep, self.owned_paths())
+                await asyncio.to_thread(self.measure, list(self.sessions.values()))
+                async with self.condition:
+                    self.condition.notify_all()
+            except Exception as e:
+                print(f"⚠️ Temp janitor error: {e}")
+            await asyncio.sleep(interval_seconds)
@@ -0,0 +1,92 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+class TranscriptTimeline:
+    """
+    Word-level timestamps stored as parallel arrays instead of a list of dicts
+
+    starts/ends are float32 seconds and offsets[i] is the character offset of word i
+    in `text` (words joined by single spaces). A trailing sentinel makes word i
+    text[offsets[i]:offsets[i + 1] - 1], so a word costs 12 bytes plus its characters.
+    """
+
+    __slots__ = ("text", "starts", "ends", "offsets")
+
+    def __init__(self):
+        self.text = ""
+        self.starts = array("f")
+        self.ends = array("f")
+        self.offsets = array("I", [0])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def duration(self) -> float:
+        return float(self.ends[-1]) if self.ends else 0.0
+
+    def word(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1] - 1]
+
+    def extend(self, words: Iterable[Any], offset_seconds: float = 0.0):
+        """Append Whisper verbose_json words ({"word", "start", "end"} dicts or objects)"""
+        tokens = []
+        position = self.offsets[-1]
+        for w in words:
+            if isinstance(w, dict):
+                token, start, end = w.get("word", ""), w.get("start", 0.0), w.get("end", 0.0)
+            else:
+                token, start, end = w.word, w.start, w.end
+            token = str(token).strip()
+            if not token:
+                continue
+            start = float(start) + offset_seconds
+            self.starts.append(start)
+            self.ends.append(max(start, float(end) + offset_seconds))
+            position += len(token) + 1
+            self.offsets.append(position)
+            tokens.append(token)
+
+        if tokens:
+            self.text = f"{self.text} {' '.join(tokens)}" if self.text else " ".join(tokens)
+
+    def _range(self, start: float, end: float) -> Tuple[int, int]:
+        """Indices [first, last) of words overlapping [start, end), by binary search"""
+        first = bisect_right(self.ends, start)
+        last = bisect_left(self.starts, end)
+        return first, max(first, last)
+
+    def words_between(self, start: float, end: float) -> List[Tuple[str, float, float]]:
+        first, last = self._range(start, end)
+        return [(self.word(i), float(self.starts[i]), float(self.ends[i])) for i in range(first, last)]
+
+    def text_between(self, start: float, end: float) -> str:
+        first, last = self._range(start, end)
+        if first == last:
+            return ""
+        return self.text[self.offsets[first]:self.offsets[last] - 1]
+
+    def word_at(self, t: float) -> Optional[Tuple[str, float, float]]:
+        i = bisect_right(self.starts, t) - 1
+        if 0 <= i < len(self) and self.ends[i] >= t:
+            return self.word(i), float(self.starts[i]), float(self.ends[i])
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON form: text plus parallel start/end arrays (ms precision)"""
+        return {
+            "text": self.text,
+            "starts": [round(x, 3) for x in self.starts],
+            "ends": [round(x, 3) for x in self.ends]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "TranscriptTimeline":
+        timeline = cls()
+        if data and data.get("text"):
+            timeline.extend(
+                {"word": w, "start": s, "end": e}
+                for w, s, e in zip(data["text"].split(" "), data.get("starts", []), data.get("ends", []))
+            )
+        return timeline
@@ -1,36 +1,106 @@
-import openai
-from typing import Optional
+from services.clients import get_openai_client
+from services.audio_chunking import AudioChunker
+from services.transcription_backends import TranscriptionBackend, create_transcription_backend
+from services.cache import JsonDiskCache, hash_file, hash_file_obj, make_cache_key
+from services.timeline import TranscriptTimeline
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
+import hashlib
 import io
+import os
+import re
 
 class TranscriptionService:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_chunk_concurrency: int = 6,
+        chunk_threshold_bytes: int = 8 * 1024 * 1024,
+        chunk_threshold_seconds: float = 300.0,
+        cache: Optional[JsonDiskCache] = None,
+        backend: Optional[TranscriptionBackend] = None
+    ):
         self.api_key = api_key
-        self.client = openai.OpenAI(api_key=api_key) if api_key and api_key != "your_openai_api_key_here" else None
+        # GPT-4o client for validation; speech-to-text goes through the pluggable backend
+        self.client = get_openai_client(api_key)
+        self.backend = backend or create_transcription_backend(api_key)
         self.stream_buffer = []
+        self.chunker = AudioChunker()
+        self.max_chunk_concurrency = max_chunk_concurrency
+        # Files above this size are split at silences and transcribed in parallel
+        # (also keeps every request under Whisper's 25MB upload cap)
+        self.chunk_threshold_bytes = chunk_threshold_bytes
+        self.chunk_threshold_seconds = chunk_threshold_seconds
+        # Raw and validated transcripts keyed by content hash + model parameters
+        self.cache = cache
+    
+    def _transcript_cache_key(self, audio_hash: str) -> str:
+        return make_cache_key("transcript", audio_hash, self.backend.name, "words")
+    
+    @staticmethod
+    def _validated_cache_key(transcript: str) -> str:
+        return make_cache_key("validated", hashlib.sha256(transcript.encode("utf-8")).hexdigest(), "gpt-4o")
+    
+    async def _get_cached_result(self, cache_key: Optional[str], name: str) -> Optional[Dict[str, Any]]:
+        cached = await self.cache.get_async(cache_key) if cache_key else None
+        if not cached:
+            return None
+        print(f"⚡ Transcript cache hit for {name}")
+        return {**cached, "timeline": TranscriptTimeline.from_dict(cached.get("timeline"))}
+    
+    async def _set_cached_result(self, cache_key: Optional[str], result: Dict[str, Any]):
+        if cache_key:
+            await self.cache.set_async(cache_key, {**result, "timeline": result["timeline"].to_dict()})
+    
+    @staticmethod
+    def _demo_result() -> Dict[str, Any]:
+        return {
+            "text": "[DEMO MODE] Transcription placeholder - add OPENAI_API_KEY to .env",
+            "chunks": [],
+            "timeline": TranscriptTimeline()
+        }
     
     async def transcribe_file_obj(self, file_obj, filename: str) -> str:
         """Transcribe using a file-like object to support large uploads without loading into memory."""
-        if not self.client:
-            return "[DEMO MODE] Transcription placeholder - add OPENAI_API_KEY to .env"
+        return (await self.transcribe_file_obj_with_timeline(file_obj, filename))["text"]
+    
+    async def transcribe_file_obj_with_timeline(self, file_obj, filename: str) -> Dict[str, Any]:
+        """
+        Transcribe a file-like object, keeping word-level timestamps
+        
+        Returns:
+            {"text": str, "chunks": [], "timeline": TranscriptTimeline}
+        """
+        if not self.backend.enabled:
+            return self._demo_result()
+        
+        cache_key = None
+        if self.cache:
+            audio_hash = await asyncio.to_thread(hash_file_obj, file_obj)
+            cache_key = self._transcript_cache_key(audio_hash)
+            cached = await self._get_cached_result(cache_key, filename)
+            if cached:
+                return cached
+        
+        response = await self._transcribe_with_backend(file_obj, filename)
+        timeline = TranscriptTimeline()
+        timeline.extend(response["words"])
+        result = {"text": response["text"], "chunks": [], "timeline": timeline}
+        await self._set_cached_result(cache_key, result)
+        return result
+    
+    async def _transcribe_with_backend(self, file_obj, filename: str) -> Dict[str, Any]:
+        """Send one file to the transcription backend (no caching); returns {"text", "words"}"""
         try:
-            # Ensure file is at the beginning
+            # Stream the caller's file object (spooled upload or file on disk) straight
+            # to the backend - no intermediate bytes/BytesIO copies
+            file_obj.seek(0, os.SEEK_END)
+            size = file_obj.tell()
             file_obj.seek(0)
             
-            # Read the file data into bytes for OpenAI SDK compatibility
-            audio_data = file_obj.read()
-            
-            # Create BytesIO object with proper name attribute
-            audio_file = io.BytesIO(audio_data)
-            audio_file.name = filename or "audio.webm"
+            print(f"Transcribing file: {filename}, size: {size} bytes")
             
-            print(f"Transcribing file: {filename}, size: {len(audio_data)} bytes")
-            
-            transcript = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"
-            )
-            return transcript
+            return await self.backend.transcribe_verbose(file_obj, filename or "audio.webm")
         except Exception as e:
             error_msg = str(e)
             print(f"Transcription error for {filename}: {error_msg}")
@@ -38,51 +108,208 @@ class TranscriptionService:
     
     async def transcribe_file(self, audio_data: bytes, filename: str) -> str:
         """Transcribe uploaded audio file using Whisper"""
-        if not self.client:
-            return "[DEMO MODE] Transcription placeholder - add OPENAI_API_KEY to .env"
+        audio_file = io.BytesIO(audio_data)
+        return await self.transcribe_file_obj(audio_file, filename)
+    
+    async def transcribe_path(self, audio_path: str, filename: Optional[str] = None, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Transcribe an audio file on disk, switching to chunked mode for long recordings
         
-        try:
-            audio_file = io.BytesIO(audio_data)
-            audio_file.name = filename
-            
-            transcript = self.client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"
-            )
-            
-            return transcript
-        except Exception as e:
-            raise Exception(f"Transcription failed: {str(e)}")
+        Returns:
+            {"text": str, "chunks": [{"index", "start", "end", "text"}], "timeline": TranscriptTimeline}
+            (chunks empty for single-request mode; timeline times are relative to the whole file)
+        """
+        if duration is None:
+            duration = await self.chunker.get_duration(audio_path)
+        # Compressed audio can be long yet small, so check duration as well as size; an
+        # unknown duration (0.0, e.g. MediaRecorder WebM) is not assumed to be short
+        if (os.path.getsize(audio_path) > self.chunk_threshold_bytes
+                or duration <= 0 or duration > self.chunk_threshold_seconds):
+            return await self.transcribe_chunked(audio_path)
+        
+        with open(audio_path, 'rb') as audio_file:
+            return await self.transcribe_file_obj_with_timeline(audio_file, filename or os.path.basename(audio_path))
     
-    async def validate_and_enhance_transcript(self, transcript: str) -> str:
-        """Fact-check and enhance transcript using GPT-4o"""
-        if not self.client:
-            return transcript
+    async def transcribe_chunked(self, audio_path: str) -> Dict[str, Any]:
+        """
+        Split audio at silence boundaries and transcribe the chunks concurrently
+        
+        Chunks are stitched back in order; each keeps its time offset in the recording,
+        which is also added to its word timestamps when they are merged into one timeline.
+        """
+        if not self.backend.enabled:
+            return self._demo_result()
+        
+        cache_key = None
+        if self.cache:
+            cache_key = self._transcript_cache_key(await asyncio.to_thread(hash_file, audio_path))
+            cached = await self._get_cached_result(cache_key, os.path.basename(audio_path))
+            if cached:
+                return cached
+        
+        chunks = await self.chunker.split(audio_path)
+        semaphore = asyncio.Semaphore(self.max_chunk_concurrency)
         
         try:
-            response = self.client.chat.completions.create(
+            print(f"🎤 Transcribing {len(chunks)} chunks (max {self.max_chunk_concurrency} in flight)")
+            results = await asyncio.gather(*[self.transcribe_chunk(chunk, semaphore) for chunk in chunks])
+        finally:
+            self.chunker.cleanup_chunks(chunks)
+        
+        result = self.merge_chunk_results(results)
+        await self._set_cached_result(cache_key, result)
+        return result
+    
+    async def transcribe_chunk(self, chunk: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """
+        Transcribe one chunk file ({"path", "index", "start", "end"}) while holding semaphore
+        
+        Returns the chunk's position with its "text" and chunk-relative "words".
+        """
+        async with semaphore:
+            with open(chunk["path"], 'rb') as chunk_file:
+                response = await self._transcribe_with_backend(chunk_file, os.path.basename(chunk["path"]))
+        return {
+            "index": chunk["index"],
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "text": (response["text"] or "").strip(),
+            "words": response["words"]
+        }
+    
+    @staticmethod
+    def merge_chunk_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Stitch transcribe_chunk results in order into {"text", "chunks", "timeline"}"""
+        results = sorted(results, key=lambda r: r["index"])
+        timeline = TranscriptTimeline()
+        for r in results:
+            timeline.extend(r.pop("words"), offset_seconds=r["start"])
+        text = " ".join(r["text"] for r in results if r["text"])
+        return {"text": text, "chunks": results, "timeline": timeline}
+    
+    @staticmethod
+    def split_for_validation(transcript: str, max_chars: int = 3000) -> List[List[str]]:
+        """
+        Split a transcript into paragraphs of segments of at most ~max_chars
+        
+        Paragraph breaks are kept; long paragraphs are cut on sentence boundaries.
+        """
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", transcript):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if len(paragraph) <= max_chars:
+                paragraphs.append([paragraph])
+                continue
+            segments = []
+            current = ""
+            for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+                if current and len(current) + len(sentence) + 1 > max_chars:
+                    segments.append(current)
+                    current = ""
+                current = f"{current} {sentence}".strip()
+                # A single run-on "sentence" longer than the limit is cut on whitespace
+                while len(current) > max_chars:
+                    cut = current.rfind(" ", 0, max_chars)
+                    cut = cut if cut > 0 else max_chars
+                    segments.append(current[:cut].strip())
+                    current = current[cut:].strip()
+            if current:
+                segments.append(current)
+            paragraphs.append(segments)
+        return paragraphs
+    
+    async def _validate_segment(self, segment: str, max_continuations: int = 3) -> Tuple[str, bool]:
+        """
+        Validate one segment; if the model stops on max_tokens, ask it to continue
+        
+        Returns:
+            (text, complete) - complete is False when the output was empty or still
+            truncated, in which case text may be the original segment
+        """
+        messages = [
+            {"role": "system", "content": "You are a transcript validator. Check for transcription errors, fix obvious mistakes (e.g., 'CS214' not 'see 214'), correct technical terms, and improve clarity while preserving the original meaning. Return only the corrected transcript text."},
+            {"role": "user", "content": f"Review and correct this transcript:\n\n{segment}"}
+        ]
+        parts = []
+        complete = True
+        for _ in range(max_continuations + 1):
+            response = await self.client.chat.completions.create(
                 model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a transcript validator. Check for transcription errors, fix obvious mistakes (e.g., 'CS214' not 'see 214'), correct technical terms, and improve clarity while preserving the original meaning. Return only the corrected transcript text."},
-                    {"role": "user", "content": f"Review and correct this transcript:\n\n{transcript}"}
-                ],
+                messages=messages,
                 temperature=0.1,
                 max_tokens=2000
             )
-            
-            enhanced = response.choices[0].message.content
-            return enhanced if enhanced else transcript
-        except Exception as e:
-            # If validation fails, return original
+            choice = response.choices[0]
+            content = choice.message.content or ""
+            parts.append(content)
+            if choice.finish_reason != "length":
+                break
+            # Output was cut off - continue exactly where it stopped
+            messages = messages + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": "Continue the corrected transcript exactly where you stopped. Do not repeat any text."}
+            ]
+        else:
+            print("⚠️ Validation segment still truncated after continuations")
+            complete = False
+        
+        # Continuations start where the previous part stopped, usually at a word boundary
+        enhanced = " ".join(part.strip() for part in parts if part.strip())
+        return (enhanced, complete) if enhanced else (segment, False)
+    
+    async def validate_and_enhance_transcript(self, transcript: str) -> str:
+        """
+        Fact-check and enhance transcript using GPT-4o
+        
+        The transcript is validated in segments concurrently so long lectures are neither
+        truncated by max_tokens nor slower than the slowest segment.
+        """
+        if not self.client:
             return transcript
+        
+        cache_key = self._validated_cache_key(transcript) if self.cache else None
+        if cache_key:
+            cached = await self.cache.get_async(cache_key)
+            if cached:
+                print("⚡ Validated transcript cache hit")
+                return cached["text"]
+        
+        paragraphs = self.split_for_validation(transcript)
+        segments = [segment for paragraph in paragraphs for segment in paragraph]
+        if not segments:
+            return transcript
+        
+        semaphore = asyncio.Semaphore(self.max_chunk_concurrency)
+        
+        async def validate(segment: str) -> Tuple[str, bool]:
+            async with semaphore:
+                try:
+                    return await self._validate_segment(segment)
+                except Exception as e:
+                    # If validation fails, keep this segment's original text
+                    print(f"⚠️ Validation failed for segment: {e}")
+                    return segment, False
+        
+        print(f"✅ Validating transcript in {len(segments)} segments")
+        validated = await asyncio.gather(*[validate(segment) for segment in segments])
+        
+        # Reassemble in order, keeping the original paragraph breaks
+        results = iter(text for text, _ in validated)
+        enhanced = "\n\n".join(" ".join(next(results) for _ in paragraph) for paragraph in paragraphs)
+        
+        # Failed or truncated segments are retried next time rather than cached for good
+        if cache_key and all(complete for _, complete in validated):
+            await self.cache.set_async(cache_key, {"text": enhanced})
+        return enhanced
     
     async def transcribe_stream(self, audio_chunk: bytes, force: bool = False) -> Optional[str]:
         """
         Stream transcription - for real-time processing with low latency
         Accumulates ~2-3 seconds of audio before transcribing
         """
-        if not self.client:
+        if not self.backend.enabled:
             return None
             
         self.stream_buffer.append(audio_chunk)
@@ -107,12 +334,8 @@ class TranscriptionService:
                 
                 print(f"[STREAM] Transcribing chunk: {len(combined)} bytes")
                 
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text",
-                    language="en"  # Specify language for faster processing
-                )
+                # Specify language for faster processing
+                transcript = await self.backend.transcribe(audio_file, audio_file.name, language="en")
                 
                 return transcript.strip() if transcript else None
             except Exception as e:
@@ -121,6 +344,19 @@ class TranscriptionService:
         
         return None
     
+    async def transcribe_window(self, wav_data: bytes) -> Optional[str]:
+        """Transcribe one live-stream window (a complete WAV); returns None on failure"""
+        if not self.backend.enabled:
+            return None
+        try:
+            audio_file = io.BytesIO(wav_data)
+            audio_file.name = "window.wav"
+            transcript = await self.backend.transcribe(audio_file, audio_file.name, language="en")
+            return transcript.strip() if transcript else None
+        except Exception as e:
+            print(f"[STREAM] Transcription error: {str(e)}")
+            return None
+    
     def reset_stream_buffer(self):
         """Reset the stream buffer (call when stopping recording)"""
         self.stream_buffer = []
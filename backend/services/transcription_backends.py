@@ -0,0 +1,127 @@
+import os
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Protocol
+
+from services.clients import get_openai_client
+
+class TranscriptionBackend(Protocol):
+    """Protocol for pluggable speech-to-text backends"""
+    name: str
+    enabled: bool
+
+    async def transcribe(self, file_obj, filename: str, language: Optional[str] = None) -> str:
+        """Transcribe a file-like object (positioned at the start) and return plain text"""
+        ...
+
+    async def transcribe_verbose(self, file_obj, filename: str, language: Optional[str] = None) -> Dict[str, Any]:
+        """Like transcribe, but returns {"text", "words": [{"word", "start", "end"}]}"""
+        ...
+
+
+class WhisperAPIBackend:
+    """
+    OpenAI Whisper API (whisper-1)
+
+    The file object is handed to the SDK as-is; httpx streams it into the multipart
+    body in 64KB reads (and seeks back to the start on retries), so uploads are never
+    buffered in memory as a whole.
+    """
+
+    def __init__(self, api_key: Optional[str]):
+        self.name = "whisper-1"
+        self.client = get_openai_client(api_key)
+        self.enabled = self.client is not None
+
+    async def transcribe(self, file_obj, filename: str, language: Optional[str] = None) -> str:
+        params = {"language": language} if language else {}
+        return await self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(filename, file_obj),
+            response_format="text",
+            **params
+        )
+
+    async def transcribe_verbose(self, file_obj, filename: str, language: Optional[str] = None) -> Dict[str, Any]:
+        params = {"language": language} if language else {}
+        response = await self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(filename, file_obj),
+            response_format="verbose_json",
+            # Not a named argument in this SDK version; sent as timestamp_granularities[]=word
+            extra_body={"timestamp_granularities": ["word"]},
+            **params
+        )
+        return {"text": response.text, "words": getattr(response, "words", None) or []}
+
+
+class ReplayTranscriptionBackend:
+    """
+    Deterministic offline backend for benchmarks and demos
+
+    Looks up a fixture transcript by audio SHA-256 (<hash>.txt), then by file stem
+    (<stem>.txt) in fixtures_dir; otherwise returns a stable placeholder derived from
+    the audio hash. Latency is simulated as a fixed delay plus a per-MB delay.
+    Verbose results space words evenly at seconds_per_word.
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: Optional[str] = None,
+        latency_seconds: float = 0.0,
+        latency_per_mb_seconds: float = 0.0,
+        seconds_per_word: float = 0.4
+    ):
+        self.name = "replay"
+        self.enabled = True
+        self.fixtures_dir = fixtures_dir
+        self.latency_seconds = latency_seconds
+        self.latency_per_mb_seconds = latency_per_mb_seconds
+        self.seconds_per_word = seconds_per_word
+
+    async def transcribe(self, file_obj, filename: str, language: Optional[str] = None) -> str:
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = file_obj.read(1024 * 1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+        audio_hash = digest.hexdigest()
+
+        await asyncio.sleep(self.latency_seconds + self.latency_per_mb_seconds * size / (1024 * 1024))
+
+        if self.fixtures_dir:
+            for candidate in (f"{audio_hash}.txt", f"{Path(filename).stem}.txt"):
+                fixture = Path(self.fixtures_dir) / candidate
+                if fixture.exists():
+                    return fixture.read_text()
+
+        return f"[REPLAY] {filename} ({size} bytes, {audio_hash[:12]})"
+
+    async def transcribe_verbose(self, file_obj, filename: str, language: Optional[str] = None) -> Dict[str, Any]:
+        text = await self.transcribe(file_obj, filename, language)
+        step = self.seconds_per_word
+        words = [
+            {"word": word, "start": i * step, "end": (i + 1) * step}
+            for i, word in enumerate(text.split())
+        ]
+        return {"text": text, "words": words}
+
+
+def create_transcription_backend(api_key: Optional[str]) -> TranscriptionBackend:
+    """
+    Pick the backend from TRANSCRIPTION_BACKEND ("whisper" by default, or "replay")
+    """
+    kind = os.getenv("TRANSCRIPTION_BACKEND", "whisper").lower()
+    if kind == "replay":
+        backend = ReplayTranscriptionBackend(
+            fixtures_dir=os.getenv("TRANSCRIPTION_REPLAY_DIR"),
+            latency_seconds=float(os.getenv("TRANSCRIPTION_REPLAY_LATENCY_SECONDS", "0")),
+            latency_per_mb_seconds=float(os.getenv("TRANSCRIPTION_REPLAY_LATENCY_PER_MB_SECONDS", "0"))
+        )
+        print(f"🔁 Using replay transcription backend (fixtures: {backend.fixtures_dir or 'none'})")
+        return backend
+    return WhisperAPIBackend(api_key)
@@ -1,6 +1,7 @@
-import httpx
 from typing import Optional
 
+from services.clients import get_http_client
+
 class TTSService:
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
@@ -34,13 +35,12 @@ class TTSService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=data, headers=headers, timeout=30.0)
-                
-                if response.status_code == 200:
-                    return response.content
-                else:
-                    raise Exception(f"TTS failed: {response.status_code} - {response.text}")
+            response = await get_http_client().post(url, json=data, headers=headers, timeout=30.0)
+            
+            if response.status_code == 200:
+                return response.content
+            else:
+                raise Exception(f"TTS failed: {response.status_code} - {response.text}")
         except Exception as e:
             raise Exception(f"TTS request failed: {str(e)}")
 
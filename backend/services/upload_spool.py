@@ -0,0 +1,80 @@
+import os
+import asyncio
+import tempfile
+import aiofiles
+from typing import Optional
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload turns out to be larger than the allowed size while copying"""
+
+
+class UploadSpooler:
+    """
+    Copies uploads to a temp file in fixed-size chunks, never holding a whole upload
+    in memory
+
+    Copies are admitted against a shared byte budget: each upload reserves its
+    declared size (max_bytes when the client sent none) until its copy finishes, so a
+    burst of large uploads waits for earlier copies instead of all running at once.
+    An upload bigger than the whole budget still runs, alone.
+    """
+
+    def __init__(self, max_inflight_bytes: int = 512 * 1024 * 1024, chunk_size: int = UPLOAD_CHUNK_SIZE, temp_dir: Optional[str] = None):
+        self.max_inflight_bytes = max_inflight_bytes
+        self.chunk_size = chunk_size
+        self.temp_dir = temp_dir
+        self.inflight_bytes = 0
+        self.condition = asyncio.Condition()
+
+    async def _reserve(self, size: int):
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: self.inflight_bytes == 0 or self.inflight_bytes + size <= self.max_inflight_bytes
+            )
+            self.inflight_bytes += size
+
+    async def _release(self, size: int):
+        async with self.condition:
+            self.inflight_bytes -= size
+            self.condition.notify_all()
+
+    async def spool(self, upload, suffix: str = "", max_bytes: Optional[int] = None) -> str:
+        """
+        Copy an UploadFile (anything with async read/seek) to a new temp file
+
+        Returns:
+            Path of the temp file; the caller owns it and must delete it
+        """
+        declared = upload.size
+        if max_bytes and declared and declared > max_bytes:
+            raise UploadTooLarge(f"Upload is {declared / (1024 * 1024):.1f}MB, limit is {max_bytes / (1024 * 1024):.0f}MB")
+        reservation = min(declared or max_bytes or self.chunk_size, self.max_inflight_bytes)
+
+        await self._reserve(reservation)
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.temp_dir)
+        os.close(fd)
+        written = 0
+        try:
+            await upload.seek(0)
+            async with aiofiles.open(path, "wb") as out:
+                while True:
+                    chunk = await upload.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if max_bytes and written > max_bytes:
+                        raise UploadTooLarge(f"Upload exceeds {max_bytes / (1024 * 1024):.0f}MB")
+                    await out.write(chunk)
+        except BaseException:
+            # Includes cancellation (client disconnect) - don't leave a partial copy behind
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            await self._release(reservation)
+
+        print(f"💾 Spooled {written / (1024 * 1024):.2f}MB upload to {path}")
+        return path
@@ -0,0 +1,78 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+class VoiceActivityDetector:
+    """
+    CPU-only voice activity detector for 16-bit mono PCM
+
+    Classifies fixed-size frames using short-time energy against an adaptive noise
+    floor, with zero-crossing rate to reject hiss-like noise that is only slightly
+    louder than the floor.
+
+    The floor follows minimum statistics on every frame: it is calibrated from the
+    quietest of the first calibration_ms, drops quickly to any quieter frame and
+    creeps up by noise_rise_db_per_second otherwise. Steady background noise (fans,
+    hum) therefore ends up under the floor, while the pauses between words keep it
+    from rising into speech.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        energy_margin_db: float = 9.0,
+        min_speech_db: float = -50.0,
+        max_zcr: float = 0.3,
+        calibration_ms: int = 300,
+        noise_rise_db_per_second: float = 2.0,
+        noise_fall_rate: float = 0.5
+    ):
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * 2
+        self.frame_seconds = frame_ms / 1000
+        self.energy_margin_db = energy_margin_db
+        self.min_speech_db = min_speech_db
+        self.max_zcr = max_zcr
+        self.calibration_frames = max(1, calibration_ms // frame_ms)
+        self.noise_rise_db = noise_rise_db_per_second * self.frame_seconds
+        self.noise_fall_rate = noise_fall_rate
+        self.noise_floor_db: Optional[float] = None
+        self.frames_seen = 0
+
+    def frame_features(self, pcm: bytes) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-frame energy (dBFS) and zero-crossing rate for every complete frame in pcm"""
+        n_frames = len(pcm) // self.frame_bytes
+        if n_frames == 0:
+            return np.zeros(0), np.zeros(0)
+
+        samples = np.frombuffer(pcm[:n_frames * self.frame_bytes], dtype="<i2")
+        frames = samples.astype(np.float32).reshape(n_frames, self.frame_samples) / 32768.0
+
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return energy_db, zcr
+
+    def classify(self, pcm: bytes) -> List[bool]:
+        """Return one speech/non-speech flag per complete frame, updating the noise floor"""
+        energy_db, zcr = self.frame_features(pcm)
+        flags = []
+        for energy, crossings in zip(energy_db.tolist(), zcr.tolist()):
+            self._update_floor(energy)
+            threshold = max(self.noise_floor_db + self.energy_margin_db, self.min_speech_db)
+            voiced = energy > threshold and (crossings < self.max_zcr or energy > threshold + self.energy_margin_db)
+            flags.append(voiced)
+        return flags
+
+    def _update_floor(self, energy: float):
+        self.frames_seen += 1
+        if self.noise_floor_db is None or (self.frames_seen <= self.calibration_frames and energy < self.noise_floor_db):
+            # Calibration: the quietest frame so far
+            self.noise_floor_db = energy
+        elif energy < self.noise_floor_db:
+            self.noise_floor_db += self.noise_fall_rate * (energy - self.noise_floor_db)
+        else:
+            self.noise_floor_db = min(self.noise_floor_db + self.noise_rise_db, energy)
+        self.noise_floor_db = max(self.noise_floor_db, -90.0)
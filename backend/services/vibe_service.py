@@ -1,9 +1,14 @@
 import boto3
+import httpx
 import json
 import os
-import requests
+from urllib.parse import quote
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
 from typing import Dict, Any, Optional
 
+from services.clients import get_http_client
+
 class VibeService:
     def __init__(self):
         # Try bearer token first (new method)
@@ -16,30 +21,41 @@ class VibeService:
 
         if self.bearer_token and "YOUR_AWS" not in self.bearer_token:
             # Use bearer token authentication
-            self.client = None
+            self.credentials = None
             self.use_bearer_token = True
             print("✅ Using AWS Bedrock Bearer Token authentication")
         elif aws_access_key_id and aws_secret_access_key and "YOUR_AWS" not in aws_access_key_id:
-            # Use standard boto3 credentials
+            # Use standard AWS credentials - requests are SigV4-signed with botocore
+            # and sent over the shared async HTTP pool instead of a blocking boto3 client
             try:
-                self.client = boto3.client(
-                    'bedrock-runtime',
-                    region_name=self.region,
+                self.credentials = boto3.Session(
                     aws_access_key_id=aws_access_key_id,
-                    aws_secret_access_key=aws_secret_access_key
-                )
+                    aws_secret_access_key=aws_secret_access_key,
+                    region_name=self.region
+                ).get_credentials()
                 self.use_bearer_token = False
                 print("✅ Using AWS Bedrock standard credentials")
             except Exception as e:
-                print(f"Failed to initialize Boto3 client: {e}")
-                self.client = None
+                print(f"Failed to load AWS credentials: {e}")
+                self.credentials = None
                 self.use_bearer_token = False
         else:
-            self.client = None
+            self.credentials = None
             self.use_bearer_token = False
     
+    def _sigv4_headers(self, endpoint: str, body: str) -> Dict[str, str]:
+        """Sign a Bedrock runtime request with SigV4 and return the headers to send"""
+        request = AWSRequest(
+            method="POST",
+            url=endpoint,
+            data=body,
+            headers={"Content-Type": "application/json", "Accept": "application/json"}
+        )
+        SigV4Auth(self.credentials, "bedrock", self.region).add_auth(request)
+        return dict(request.headers.items())
+    
     async def analyze_vibe(self, transcript: str, context: str = "general") -> Dict[str, Any]:
-        if not self.client and not self.use_bearer_token:
+        if not self.credentials and not self.use_bearer_token:
             return {"vibe": "Not configured", "evidence": ["AWS Bedrock credentials not found in .env"]}
 
         # Use a fast, capable model available on Bedrock, like Claude 3 Haiku
@@ -111,39 +127,33 @@ class VibeService:
                     "Content-Type": "application/json",
                     "Accept": "application/json"
                 }
-                
-                response = requests.post(endpoint, headers=headers, data=body, timeout=30)
-                response.raise_for_status()
-                response_body = response.json()
-                json_text = response_body.get('content', [{}])[0].get('text', '{}')
-                return json.loads(json_text)
             else:
-                # Use boto3 client
-                response = self.client.invoke_model(
-                    body=body,
-                    modelId=model_id,
-                    contentType='application/json',
-                    accept='application/json'
-                )
-                response_body = json.loads(response.get('body').read())
-                json_text = response_body.get('content', [{}])[0].get('text', '{}')
-                return json.loads(json_text)
-        except requests.exceptions.RequestException as e:
-            error_message = str(e)
-            print(f"Bedrock vibe check failed (bearer token): {error_message}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_detail = e.response.json()
-                    return {"vibe": "Error", "evidence": [f"Bearer token error: {error_detail}"]}
-                except:
-                    return {"vibe": "Error", "evidence": [f"HTTP {e.response.status_code}: {error_message}"]}
-            return {"vibe": "Error", "evidence": [error_message]}
-        except Exception as e:
-            error_message = str(e)
+                # Use SigV4-signed request (same wire format boto3 would send)
+                endpoint = f"https://bedrock-runtime.{self.region}.amazonaws.com/model/{quote(model_id, safe='')}/invoke"
+                headers = self._sigv4_headers(endpoint, body)
+            
+            response = await get_http_client().post(endpoint, headers=headers, content=body, timeout=30.0)
+            response.raise_for_status()
+            response_body = response.json()
+            json_text = response_body.get('content', [{}])[0].get('text', '{}')
+            return json.loads(json_text)
+        except httpx.HTTPStatusError as e:
+            error_type = e.response.headers.get("x-amzn-ErrorType", "").split(":")[0]
+            try:
+                error_detail = e.response.json()
+            except:
+                error_detail = e.response.text
+            error_message = f"{error_type or 'HTTP ' + str(e.response.status_code)}: {error_detail}"
             print(f"Bedrock vibe check failed: {error_message}")
+            if self.use_bearer_token:
+                return {"vibe": "Error", "evidence": [f"Bearer token error: {error_detail}"]}
             # Check for common configuration errors
             if "AccessDeniedException" in error_message:
                 return {"vibe": "Error", "evidence": ["Access Denied. Check your AWS IAM permissions for Bedrock."]}
             if "ResourceNotFoundException" in error_message:
                 return {"vibe": "Error", "evidence": [f"Model '{model_id}' not found. Ensure you have access in region '{self.region}'."]}
             return {"vibe": "Error", "evidence": [error_message]}
+        except Exception as e:
+            error_message = str(e)
+            print(f"Bedrock vibe check failed: {error_message}")
+            return {"vibe": "Error", "evidence": [error_message]}
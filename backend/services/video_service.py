@@ -1,26 +1,58 @@
 import os
 import uuid
-import subprocess
 import shutil
 import base64
+import re
 from pathlib import Path
 from typing import List, Dict, Any, Protocol, Optional
 import asyncio
 from PIL import Image
 import io
 
+from services.media_probe import MediaInfo, MediaProber, StreamInfo
+from services.mjpeg import MjpegStreamParser
+from services.process_runner import ProcessRunner, ProcessTimeout, get_process_runner
+
+# Audio encodings for Whisper uploads (16 kHz mono is all Whisper uses)
+AUDIO_ENCODINGS = {
+    "wav": {"extension": ".wav", "args": ["-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1"]},
+    "opus": {"extension": ".ogg", "args": ["-c:a", "libopus", "-b:a", "24k", "-ar", "16000", "-ac", "1", "-application", "voip"]},
+}
+# Audio codecs Whisper accepts as-is, mapped to the container extension used for stream copy
+COPYABLE_AUDIO_CODECS = {"aac": ".m4a", "mp3": ".mp3"}
+MAX_COPY_AUDIO_BITRATE = 96_000  # above this, a 24 kbps Opus transcode is worth the CPU
+
+# stderr lines worth keeping from frame extraction: showinfo's per-frame pts_time
+SHOWINFO_PATTERN = r"Parsed_showinfo"
+
+# Frames are scaled and lossy-encoded inside the ffmpeg filter graph (never written as PNG)
+FRAME_FORMATS = {
+    "jpeg": {"extension": ".jpg", "mime_type": "image/jpeg"},
+    "webp": {"extension": ".webp", "mime_type": "image/webp"},
+}
+# Per vision mode: GPT-4o "low" detail sees at most 512px, Gemini Flash gets thumbnails
+FRAME_PROFILES = {
+    "fast": {"max_dimension": 256, "format": "jpeg", "quality": 75},
+    "balanced": {"max_dimension": 512, "format": "jpeg", "quality": 80},
+    "detailed": {"max_dimension": 512, "format": "jpeg", "quality": 85},
+}
+# In-memory seek mode: how much of the file each seeked input may decode to find its frame
+SEEK_READ_WINDOW_SECONDS = 5
+
 class FrameAnalyzer(Protocol):
     """Protocol for pluggable frame analyzers"""
-    async def analyze(self, frame_path: str, timestamp: float, frame_number: int) -> Dict[str, Any]:
-        """Analyze a single frame and return structured results"""
+    async def analyze(self, frame_path: Optional[str], timestamp: float, frame_number: int, frame_data: Optional[bytes] = None) -> Dict[str, Any]:
+        """Analyze a single frame (encoded image in frame_data, or on disk at frame_path)"""
         ...
 
 class VideoProcessor:
-    def __init__(self, temp_dir: str = "/tmp/eve_video"):
+    def __init__(self, temp_dir: str = "/tmp/eve_video", runner: Optional[ProcessRunner] = None, prober: Optional[MediaProber] = None):
         self.temp_dir = temp_dir
+        self.runner = runner or get_process_runner()
+        self.prober = prober or MediaProber(runner=self.runner)
         Path(temp_dir).mkdir(parents=True, exist_ok=True)
     
-    def extract_frames(self, video_path: str, fps: float = 0.2, max_dimension: int = 256) -> List[Dict[str, Any]]:
+    async def extract_frames(self, video_path: str, fps: float = 0.2, max_dimension: int = 256, image_format: str = "jpeg", quality: int = 80) -> List[Dict[str, Any]]:
         """
         Extract keyframes from video using ffmpeg
         
@@ -28,104 +60,396 @@ class VideoProcessor:
             video_path: Path to input video file
             fps: Frames per second to extract (default 1 = 1 frame/second)
             max_dimension: Maximum width/height for extracted frames (saves API costs)
+            image_format: "jpeg" or "webp"
+            quality: Encoder quality, 1-100
             
         Returns:
-            List of dicts with frame info: {"path": str, "timestamp": float, "number": int}
+            List of dicts with frame info: {"path": str, "timestamp": float, "number": int, "mime_type": str}
         """
         session_id = str(uuid.uuid4())
         output_dir = os.path.join(self.temp_dir, session_id)
         os.makedirs(output_dir, exist_ok=True)
         
-        output_pattern = os.path.join(output_dir, "frame_%04d.png")
+        output_pattern = os.path.join(output_dir, f"frame_%04d{FRAME_FORMATS[image_format]['extension']}")
         
         # ffmpeg command to extract frames at specified fps
-        # -vf fps=1 means 1 frame per second
-        # scale filter maintains aspect ratio
-        # Use the simplest possible command that works
+        # select keeps one frame per 1/fps seconds with its original timestamp
+        # (showinfo logs it); scale filter maintains aspect ratio
         cmd = [
             "ffmpeg",
             "-i", video_path,
-            "-vf", f"fps={fps}",
+            "-vf", f"{self.sample_filter(1 / fps)},{self.scale_filter(max_dimension)},showinfo",
+            "-vsync", "vfr",
+            *self.image_codec_args(image_format, quality),
             "-y",  # Overwrite existing files
             output_pattern
         ]
         
         try:
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=300  # 5 min timeout
-            )
-            
             print(f"ffmpeg command: {' '.join(cmd)}")
-            print(f"ffmpeg stdout: {result.stdout}")
-            print(f"ffmpeg stderr: {result.stderr}")
+            result = await self.runner.run(cmd, timeout=300, stderr_pattern=SHOWINFO_PATTERN, capture_stdout=False)
             
             if result.returncode != 0:
-                print(f"ffmpeg error (return code {result.returncode}): {result.stderr}")
-                if "not found" in result.stderr.lower() or "no such file" in result.stderr.lower():
-                    raise Exception("ffmpeg not installed. Install with: brew install ffmpeg (macOS) or apt install ffmpeg (Linux)")
-                raise Exception(f"Frame extraction failed: {result.stderr}")
-            
-            # Get list of extracted frames
-            frames = []
-            for i, frame_file in enumerate(sorted(Path(output_dir).glob("frame_*.png"))):
-                timestamp = i / fps  # Calculate timestamp based on fps
-                frames.append({
-                    "path": str(frame_file),
-                    "timestamp": timestamp,
-                    "number": i + 1,
-                    "session_id": session_id
-                })
+                print(f"ffmpeg error (return code {result.returncode}): {result.stderr_tail}")
+                raise Exception(result.stderr_tail)
             
+            frame_times = self.parse_frame_times(result.matched_stderr, (await self.probe_media(video_path)).start_time)
+            frames = self._collect_frames(output_dir, session_id, frame_times)
             print(f"✅ Extracted {len(frames)} frames from video (fps={fps})")
             return frames
             
-        except subprocess.TimeoutExpired:
+        except ProcessTimeout:
+            shutil.rmtree(output_dir, ignore_errors=True)
             raise Exception("Video processing timed out (>5 minutes)")
-        except FileNotFoundError:
-            raise Exception("ffmpeg not found. Install with: brew install ffmpeg (macOS) or apt install ffmpeg (Linux)")
+        except asyncio.CancelledError:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
         except Exception as e:
             # Cleanup on error
-            if os.path.exists(output_dir):
-                shutil.rmtree(output_dir)
+            shutil.rmtree(output_dir, ignore_errors=True)
             raise Exception(f"Frame extraction failed: {str(e)}")
     
-    def extract_audio(self, video_path: str) -> str:
+    @staticmethod
+    def sample_filter(min_interval: float) -> str:
+        """Keep frames at least min_interval seconds apart, without retiming them (unlike fps=)"""
+        return f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{min_interval:.3f})'"
+    
+    @staticmethod
+    def parse_frame_times(stderr: str, start_time: float = 0.0) -> List[float]:
+        """
+        Presentation timestamps of the frames logged by the showinfo filter, relative
+        to the start of the file (the same origin as -ss and the extracted audio)
+        """
+        return [
+            round(max(0.0, float(t) - start_time), 3)
+            for t in re.findall(SHOWINFO_PATTERN + r".*?pts_time:\s*(-?[\d.]+)", stderr)
+        ]
+    
+    @staticmethod
+    def parse_seek_frame_times(stderr: str, timestamps: List[float], filters_per_chain: int = 3) -> List[Optional[float]]:
+        """
+        Per seek target, the time of the frame its input produced (None if its window had none)
+        
+        Each seek chain ends in its own showinfo, logged as Parsed_showinfo_<n> where n is
+        the filter's position in the graph; its pts_time counts from the seek point.
+        """
+        found: Dict[int, float] = {}
+        for index, pts_time in re.findall(r"Parsed_showinfo_(\d+).*?pts_time:\s*(-?[\d.]+)", stderr):
+            chain, position = divmod(int(index), filters_per_chain)
+            if position == filters_per_chain - 1 and chain < len(timestamps) and chain not in found:
+                found[chain] = round(timestamps[chain] + max(0.0, float(pts_time)), 3)
+        return [found.get(i) for i in range(len(timestamps))]
+    
+    @staticmethod
+    def scale_filter(max_dimension: int) -> str:
+        """Downscale to fit max_dimension x max_dimension, keeping aspect ratio (never upscales)"""
+        return (f"scale='min({max_dimension},iw)':'min({max_dimension},ih)'"
+                f":force_original_aspect_ratio=decrease")
+    
+    @staticmethod
+    def image_codec_args(image_format: str, quality: int) -> List[str]:
+        """ffmpeg encoder args for one still image, quality on a 1-100 scale"""
+        if image_format == "webp":
+            return ["-c:v", "libwebp", "-quality", str(quality)]
+        # mjpeg -q:v runs from 2 (best) to 31 (worst)
+        return ["-c:v", "mjpeg", "-q:v", str(round(2 + (100 - quality) * 29 / 100))]
+    
+    @staticmethod
+    def _collect_frames(output_dir: str, session_id: str, timestamps: List[float]) -> List[Dict[str, Any]]:
+        """List frames written as frame_%04d.<ext>; frame N was taken at timestamps[N - 1]"""
+        mime_types = {f["extension"]: f["mime_type"] for f in FRAME_FORMATS.values()}
+        frames = []
+        for frame_file in sorted(Path(output_dir).glob("frame_*")):
+            index = int(frame_file.stem.split("_")[1]) - 1
+            if index >= len(timestamps):
+                continue
+            frames.append({
+                "path": str(frame_file),
+                "timestamp": timestamps[index],
+                "number": len(frames) + 1,
+                "session_id": session_id,
+                "mime_type": mime_types.get(frame_file.suffix, "image/jpeg")
+            })
+        return frames
+    
+    @staticmethod
+    def _parse_frame_stream(stream: bytes, session_id: str, timestamps: List[float]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Split an MJPEG image2pipe stream into in-memory frames; frame N was taken at timestamps[N - 1]
+        
+        Returns None when the image and timestamp counts differ, since frames can then no
+        longer be matched to their times.
+        """
+        images = MjpegStreamParser().feed(stream)
+        if len(images) != len(timestamps):
+            print(f"⚠️ Frame stream has {len(images)} images for {len(timestamps)} timestamps")
+            return None
+        return [
+            {
+                "data": image,
+                "timestamp": timestamp,
+                "number": number,
+                "session_id": session_id,
+                "mime_type": "image/jpeg"
+            }
+            for number, (image, timestamp) in enumerate(zip(images, timestamps), start=1)
+        ]
+    
+    @staticmethod
+    def plan_timestamps(duration: float, count: int) -> List[float]:
+        """Evenly spaced targets at the middle of count equal slices of the video"""
+        if duration <= 0 or count <= 0:
+            return [0.0]
+        return [round(duration * (i + 0.5) / count, 3) for i in range(count)]
+    
+    async def extract_media(
+        self,
+        video_path: str,
+        fps: Optional[float] = None,
+        timestamps: Optional[List[float]] = None,
+        keyframes: bool = False,
+        max_frames: int = 15,
+        frame_profile: str = "balanced",
+        audio_mode: str = "auto",
+        media_info: Optional[MediaInfo] = None,
+        in_memory: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Extract the audio track and frames in a single ffmpeg process
+        
+        Frames come from one of three modes:
+        - timestamps: one input per target seeked with -ss before -i, so ffmpeg only
+          decodes from the keyframe preceding each target (cost scales with frames kept);
+          accurate seeking returns the first frame at or after each target
+        - keyframes: I-frames only (-skip_frame nokey), thinned to ~max_frames by a
+          minimum gap; nothing else is decoded
+        - fps: decode everything and keep one frame per 1/fps seconds
+        Frame timestamps are the frames' real presentation times (showinfo), so they
+        stay correct for variable-frame-rate recordings. Streams the probe did not find
+        are skipped: no audio output for silent videos, no frames for audio-only files.
+        
+        With in_memory, frames are not written to disk: ffmpeg streams them as MJPEG on
+        stdout (-f image2pipe) and each frame dict carries its JPEG bytes under "data"
+        instead of a "path". Seek mode then trims each seeked input to one frame and
+        concatenates them into that single stream; a showinfo per input tells which
+        targets produced a frame. If frames cannot be matched to their times, the
+        extraction is redone on disk.
+        
+        Args:
+            video_path: Path to input video file
+            fps: Frames per second for fps mode
+            timestamps: Target times in seconds for seek mode
+            keyframes: Use keyframe mode
+            max_frames: Target frame count for keyframe mode
+            frame_profile: Key of FRAME_PROFILES (size, format and quality of the frames)
+            audio_mode: Same modes as extract_audio
+            media_info: Result of probe_media, if the caller already has it
+            in_memory: Return frame bytes from an ffmpeg pipe instead of files (always JPEG)
+        
+        Returns:
+            {"audio_path": str or None (no audio track), "frames": [...], "session_id": str, "duration": float}
+        """
+        info = media_info or await self.probe_media(video_path)
+        session_id = str(uuid.uuid4())
+        output_dir = os.path.join(self.temp_dir, session_id)
+        profile = FRAME_PROFILES.get(frame_profile, FRAME_PROFILES["balanced"])
+        scale = self.scale_filter(profile["max_dimension"])
+        if in_memory:
+            # The stdout parser splits on JPEG markers, so the pipe is always MJPEG
+            frame_target = ["-f", "image2pipe", *self.image_codec_args("jpeg", profile["quality"]), "pipe:1"]
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+            extension = FRAME_FORMATS[profile["format"]]["extension"]
+            image_args = self.image_codec_args(profile["format"], profile["quality"])
+            frame_target = [*image_args, os.path.join(output_dir, f"frame_%04d{extension}")]
+        
+        # Input 0 feeds the audio (and fps mode); frame modes add their own inputs
+        inputs = ["-i", video_path]
+        outputs = []
+        audio_path = None
+        if info.has_audio:
+            audio_mode, audio_extension, args = self._audio_output(audio_mode, info.audio)
+            audio_path = os.path.join(self.temp_dir, f"{session_id}_audio{audio_extension}")
+            outputs += ["-map", "0:a:0", "-vn", *args, audio_path]
+        
+        if not info.has_video:
+            mode = "audio only"
+            if not outputs:
+                raise Exception("File has no audio or video stream to extract")
+        elif timestamps is not None and in_memory:
+            mode = "seek"
+            chains = []
+            for i, t in enumerate(timestamps, start=1):
+                inputs += ["-ss", f"{t:.3f}", "-t", str(SEEK_READ_WINDOW_SECONDS), "-i", video_path]
+                # Three filters per chain: parse_seek_frame_times relies on the count
+                chains.append(f"[{i}:v:0]trim=end_frame=1,{scale},showinfo[f{i}]")
+            labels = "".join(f"[f{i}]" for i in range(1, len(timestamps) + 1))
+            graph = ";".join(chains + [f"{labels}concat=n={len(timestamps)}:v=1:a=0[frames]"])
+            outputs += ["-filter_complex", graph, "-map", "[frames]", "-vsync", "vfr", *frame_target]
+        elif timestamps is not None:
+            mode = "seek"
+            for i, t in enumerate(timestamps, start=1):
+                inputs += ["-ss", f"{t:.3f}", "-i", video_path]
+                outputs += [
+                    "-map", f"{i}:v:0", "-frames:v", "1", "-vf", scale, *image_args,
+                    os.path.join(output_dir, f"frame_{i:04d}{extension}")
+                ]
+        elif keyframes:
+            mode = "keyframes"
+            min_gap = info.duration / max(max_frames, 1)
+            inputs += ["-skip_frame", "nokey", "-i", video_path]
+            outputs += [
+                "-map", "1:v:0", "-an",
+                "-vf", f"{self.sample_filter(min_gap)},{scale},showinfo",
+                "-vsync", "vfr", *frame_target
+            ]
+        else:
+            mode = f"fps={fps}"
+            outputs += [
+                "-map", "0:v:0", "-an",
+                "-vf", f"{self.sample_filter(1 / fps)},{scale},showinfo",
+                "-vsync", "vfr", *frame_target
+            ]
+        
+        try:
+            result = await self.runner.run(
+                ["ffmpeg", "-y", *inputs, *outputs],
+                timeout=300,
+                stderr_pattern=SHOWINFO_PATTERN,
+                capture_stdout=in_memory
+            )
+            if result.returncode != 0:
+                raise Exception(result.stderr_tail)
+        except ProcessTimeout:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+            raise Exception("Video processing timed out (>5 minutes)")
+        except asyncio.CancelledError:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+            raise
+        except Exception as e:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            if audio_path and os.path.exists(audio_path):
+                os.remove(audio_path)
+            if audio_path and audio_mode != "wav":
+                # e.g. ffmpeg built without libopus - fall back to PCM
+                print(f"⚠️ Media extraction ({audio_mode}) failed, falling back to WAV audio: {e}")
+                return await self.extract_media(video_path, fps, timestamps, keyframes, max_frames, frame_profile, "wav", info, in_memory)
+            raise Exception(f"Media extraction failed: {str(e)}")
+        
+        if not info.has_video:
+            frame_times = []
+        elif timestamps is not None and in_memory:
+            # Windows past the end of the video (or without a decodable frame) yield nothing
+            seek_times = self.parse_seek_frame_times(result.matched_stderr, timestamps)
+            frame_times = [t for t in seek_times if t is not None]
+        elif timestamps is not None:
+            frame_times = list(timestamps)
+        else:
+            frame_times = self.parse_frame_times(result.matched_stderr, info.start_time)
+        if in_memory:
+            frames = self._parse_frame_stream(result.stdout, session_id, frame_times)
+            if frames is None:
+                print("⚠️ Could not match in-memory frames to their timestamps - extracting to disk instead")
+                if audio_path and os.path.exists(audio_path):
+                    os.remove(audio_path)
+                return await self.extract_media(video_path, fps, timestamps, keyframes, max_frames, frame_profile, audio_mode, info, in_memory=False)
+        else:
+            frames = self._collect_frames(output_dir, session_id, frame_times)
+        
+        audio_note = f"{audio_mode} audio ({os.path.getsize(audio_path) / (1024 * 1024):.2f}MB)" if audio_path else "no audio"
+        print(f"✅ Extracted {audio_note} and {len(frames)} frames in one ffmpeg run ({mode}{', in memory' if in_memory else ''})")
+        return {"audio_path": audio_path, "frames": frames, "session_id": session_id, "duration": info.duration}
+    
+    def _audio_output(self, mode: str, stream: Optional[StreamInfo]):
+        """Resolve an extraction mode to (mode, extension, ffmpeg output args)"""
+        if mode == "auto":
+            mode = self.choose_audio_mode(stream)
+        copy_extension = COPYABLE_AUDIO_CODECS.get(stream.codec_name) if stream else None
+        if mode == "copy" and not copy_extension:
+            mode = "opus"
+        if mode == "copy":
+            return mode, copy_extension, ["-c:a", "copy"]
+        return mode, AUDIO_ENCODINGS[mode]["extension"], AUDIO_ENCODINGS[mode]["args"]
+    
+    async def extract_audio(self, video_path: str, mode: str = "auto") -> str:
         """
         Extract audio track from video to temporary file
         
+        Args:
+            video_path: Path to input video file
+            mode: "auto" (cheapest for the source), "copy" (stream-copy AAC/MP3 without
+                  re-encoding), "opus" (24 kbps mono Opus/OGG) or "wav" (16-bit PCM)
+        
         Returns:
-            Path to extracted audio file (WAV format)
+            Path to extracted audio file (extension matches the chosen encoding)
         """
+        stream = await self.probe_audio_stream(video_path) if mode in ("auto", "copy") else None
+        mode, extension, args = self._audio_output(mode, stream)
+        
         session_id = str(uuid.uuid4())
-        audio_path = os.path.join(self.temp_dir, f"{session_id}_audio.wav")
+        audio_path = os.path.join(self.temp_dir, f"{session_id}_audio{extension}")
         
         cmd = [
             "ffmpeg",
             "-i", video_path,
             "-vn",  # No video
-            "-acodec", "pcm_s16le",  # WAV format
-            "-ar", "16000",  # 16kHz sample rate (good for Whisper)
-            "-ac", "1",  # Mono
+            "-map", "0:a:0",
+            *args,
+            "-y",
             audio_path
         ]
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = await self.runner.run(cmd, timeout=120, capture_stdout=False)
             
             if result.returncode != 0:
-                raise Exception(f"Audio extraction failed: {result.stderr}")
+                raise Exception(f"Audio extraction failed: {result.stderr_tail}")
             
-            print(f"✅ Extracted audio from video: {audio_path}")
+            size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+            print(f"✅ Extracted audio from video ({mode}, {size_mb:.2f}MB): {audio_path}")
             return audio_path
             
         except Exception as e:
             if os.path.exists(audio_path):
                 os.remove(audio_path)
+            if mode != "wav":
+                # e.g. ffmpeg built without libopus - fall back to PCM
+                print(f"⚠️ Audio extraction ({mode}) failed, falling back to WAV: {e}")
+                return await self.extract_audio(video_path, mode="wav")
             raise Exception(f"Audio extraction failed: {str(e)}")
     
+    @staticmethod
+    def choose_audio_mode(audio_stream: Optional[StreamInfo]) -> str:
+        """
+        Pick the cheapest extraction for this source: stream-copy a compact AAC/MP3
+        track (no decode at all), otherwise transcode to low-bitrate Opus
+        """
+        if (audio_stream and audio_stream.codec_name in COPYABLE_AUDIO_CODECS
+                and 0 < audio_stream.bit_rate <= MAX_COPY_AUDIO_BITRATE):
+            return "copy"
+        return "opus"
+    
+    async def probe_audio_stream(self, video_path: str) -> Optional[StreamInfo]:
+        """Return the first audio stream (None if there is none or the file cannot be probed)"""
+        try:
+            return (await self.probe_media(video_path)).audio
+        except Exception:
+            return None
+    
+    async def probe_media(self, video_path: str) -> MediaInfo:
+        """
+        Duration, start time, container and stream metadata from one ffprobe call
+        (cached by content hash)
+        
+        Raises:
+            MediaProbeError if the file cannot be read as media
+        """
+        return await self.prober.probe(video_path)
+    
     def cleanup_session(self, session_id: str):
         """Clean up temporary files for a session"""
         session_dir = os.path.join(self.temp_dir, session_id)
@@ -139,21 +463,11 @@ class VideoProcessor:
             os.remove(audio_path)
             print(f"🧹 Cleaned up audio: {audio_path}")
     
-    @staticmethod
-    def get_video_duration(video_path: str) -> float:
-        """Get video duration in seconds"""
-        cmd = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            video_path
-        ]
-        
+    async def get_video_duration(self, video_path: str) -> float:
+        """Get video duration in seconds (0.0 if the file cannot be probed)"""
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            return float(result.stdout.strip())
-        except:
+            return (await self.probe_media(video_path)).duration
+        except Exception:
             return 0.0
     
     @staticmethod
@@ -199,13 +513,14 @@ class VideoAnalysisAggregator:
     """Aggregates frame-level analysis into high-level insights"""
     
     @staticmethod
-    def aggregate_frame_results(frame_results: List[Dict[str, Any]], transcript: str = "") -> Dict[str, Any]:
+    def aggregate_frame_results(frame_results: List[Dict[str, Any]], transcript: str = "", video_duration: Optional[float] = None) -> Dict[str, Any]:
         """
         Aggregate frame analysis results into summary
         
         Args:
             frame_results: List of per-frame analysis results
             transcript: Optional audio transcript for cross-modal analysis
+            video_duration: Probed duration of the whole video (defaults to the last frame's timestamp)
             
         Returns:
             Aggregated video summary
@@ -222,7 +537,10 @@ class VideoAnalysisAggregator:
         
         # Extract key information
         total_frames = len(frame_results)
-        duration = frame_results[-1].get("timestamp", 0) if frame_results else 0
+        if video_duration:
+            duration = video_duration
+        else:
+            duration = max(f.get("timestamp", 0) for f in frame_results)
         
         # Aggregate emotions (if present)
         emotions_timeline = []
@@ -381,7 +699,7 @@ class VideoAnalysisAggregator:
         Args:
             video_summary: Aggregated video analysis
             transcript: Audio transcript
-            openai_client: OpenAI client instance
+            openai_client: AsyncOpenAI client instance
             
         Returns:
             Natural language summary
@@ -415,7 +733,7 @@ class VideoAnalysisAggregator:
         """
         
         try:
-            response = openai_client.chat.completions.create(
+            response = await openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a video analysis expert. Provide clear, actionable summaries."},
@@ -1,23 +1,48 @@
-import openai
+from services.clients import get_openai_client
 import google.generativeai as genai
 from typing import Dict, Any, Optional, List
 import base64
 from pathlib import Path
 import json
 import asyncio
+import mimetypes
 import os
 
+
+def load_frame_bytes(frame: Dict[str, Any]) -> bytes:
+    """Encoded image bytes of a frame: frame["data"] for in-memory frames, else the file at frame["path"]"""
+    if frame.get("data") is not None:
+        return frame["data"]
+    with open(frame["path"], "rb") as image_file:
+        return image_file.read()
+
+
+def frame_base64(frame: Dict[str, Any]) -> str:
+    """Base64 payload of a frame, as prepared by FramePreprocessor when available"""
+    if frame.get("base64"):
+        return frame["base64"]
+    return base64.b64encode(load_frame_bytes(frame)).decode('utf-8')
+
+
 class GPT4oVisionAnalyzer:
-    """OpenAI GPT-4o Vision analyzer - best for OCR and detailed reasoning"""
+    """
+    OpenAI GPT-4o Vision analyzer - best for OCR and detailed reasoning
     
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key) if api_key and api_key != "your_openai_api_key_here" else None
+    Batches of one video are sent concurrently, at most max_concurrent_batches at a time
+    (across all videos sharing this analyzer).
+    """
+    
+    def __init__(self, api_key: str, max_concurrent_batches: int = 4):
+        self.client = get_openai_client(api_key)
         self.model = "gpt-4o"
+        self.max_concurrent_batches = max_concurrent_batches
+        self.batch_slots = asyncio.Semaphore(max_concurrent_batches)
     
-    async def analyze(self, frame_path: str, timestamp: float, frame_number: int) -> Dict[str, Any]:
+    async def analyze(self, frame_path: Optional[str], timestamp: float, frame_number: int, frame_data: Optional[bytes] = None) -> Dict[str, Any]:
         """
         Analyze a single frame using GPT-4o Vision
         
+        The image is frame_data when given (in-memory frames), otherwise read from frame_path.
         Returns structured data about what's in the frame
         """
         if not self.client:
@@ -29,8 +54,8 @@ class GPT4oVisionAnalyzer:
         
         try:
             # Encode image to base64
-            with open(frame_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+            base64_image = base64.b64encode(load_frame_bytes({"path": frame_path, "data": frame_data})).decode('utf-8')
+            mime_type = (mimetypes.guess_type(frame_path)[0] if frame_path else None) or 'image/jpeg'
             
             # Create analysis prompt
             prompt = """
@@ -53,7 +78,7 @@ class GPT4oVisionAnalyzer:
             Return ONLY valid JSON, no markdown formatting.
             """
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {
@@ -63,7 +88,7 @@ class GPT4oVisionAnalyzer:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}",
+                                    "url": f"data:{mime_type};base64,{base64_image}",
                                     "detail": "high"  # High detail for better OCR
                                 }
                             }
@@ -129,27 +154,25 @@ Return valid JSON only, no other text."""
             # Add images with error checking
             for i, frame in enumerate(batch):
                 try:
-                    if not os.path.exists(frame["path"]):
+                    if not frame.get("base64") and frame.get("data") is None and not os.path.exists(frame["path"]):
                         print(f"❌ Frame file not found: {frame['path']}")
                         continue
                         
-                    with open(frame["path"], "rb") as image_file:
-                        image_data = image_file.read()
-                        if len(image_data) == 0:
-                            print(f"❌ Empty image file: {frame['path']}")
-                            continue
-                            
-                        base64_image = base64.b64encode(image_data).decode('utf-8')
-                        content.append({
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}",
-                                "detail": "low"  # Use low detail for faster processing
-                            }
-                        })
-                        print(f"✅ Added frame {i+1}/{len(batch)} to batch (size: {len(image_data)} bytes)")
+                    base64_image = frame_base64(frame)
+                    if not base64_image:
+                        print(f"❌ Empty image for frame {frame['number']}")
+                        continue
+                        
+                    content.append({
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{frame.get('mime_type', 'image/jpeg')};base64,{base64_image}",
+                            "detail": "low"  # Use low detail for faster processing
+                        }
+                    })
+                    print(f"✅ Added frame {i+1}/{len(batch)} to batch (size: {len(base64_image) * 3 // 4} bytes)")
                 except Exception as e:
-                    print(f"❌ Failed to process frame {frame['path']}: {e}")
+                    print(f"❌ Failed to process frame {frame['number']}: {e}")
                     continue
             
             if len(content) == 1:  # Only text, no images loaded
@@ -158,7 +181,7 @@ Return valid JSON only, no other text."""
                 
             print(f"🔍 Sending {len(content)-1} images to GPT-4o Vision...")
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": content}],
                 max_tokens=1000,
@@ -192,7 +215,7 @@ Return valid JSON only, no other text."""
                 if j < len(batch):
                     result["timestamp"] = batch[j]["timestamp"]
                     result["frame_number"] = batch[j]["number"]
-                    result["path"] = batch[j]["path"]
+                    result["path"] = batch[j].get("path")
                     result["analyzer"] = "gpt-4o-vision-batch"
             
             return batch_results
@@ -216,48 +239,26 @@ Return valid JSON only, no other text."""
         
         print(f"🎞️ Starting GPT-4o Vision analysis for {len(frames)} frames")
         
-        # STRATEGY 1: Try small batch processing first (most reliable)
+        # STRATEGY 1: Small batches, dispatched concurrently (most reliable)
+        # STRATEGY 2: A batch that fails is re-analyzed frame by frame, on its own
         try:
-            batch_size = min(4, len(frames))  # Very small batches for reliability
-            print(f"📊 Strategy 1: Small batch processing (batch_size={batch_size})")
+            batch_size = max(1, min(4, len(frames)))  # Very small batches for reliability
+            batches = [frames[i:i + batch_size] for i in range(0, len(frames), batch_size)]
+            print(f"📊 Strategy 1: {len(batches)} batches of up to {batch_size} frames "
+                  f"({self.max_concurrent_batches} in flight)")
             
-            if len(frames) <= batch_size:
-                # Single small batch
-                results = await self._analyze_single_batch(frames)
-                if results and len(results) > 0:
-                    print(f"✅ Batch processing successful: {len(results)} results")
-                    return results
-                else:
-                    print("⚠️ Batch processing returned empty results")
-            else:
-                # Multiple small batches
-                all_results = []
-                for i in range(0, len(frames), batch_size):
-                    batch = frames[i:i + batch_size]
-                    print(f"🔍 Processing batch {i//batch_size + 1}/{(len(frames) + batch_size - 1)//batch_size}")
-                    
-                    batch_results = await self._analyze_single_batch(batch)
-                    if batch_results:
-                        all_results.extend(batch_results)
-                    else:
-                        print(f"⚠️ Batch {i//batch_size + 1} failed, continuing...")
-                
-                if all_results and len(all_results) > 0:
-                    print(f"✅ Multi-batch processing successful: {len(all_results)} results")
-                    return all_results
-                    
+            batch_results = await asyncio.gather(*(
+                self._analyze_batch_with_fallback(batch, i, len(batches))
+                for i, batch in enumerate(batches)
+            ))
+            # gather keeps batch order, so results stay in frame order
+            all_results = [result for results in batch_results for result in results]
+            if all_results:
+                print(f"✅ Batch processing successful: {len(all_results)} results")
+                return all_results
+            print("⚠️ Batch processing returned empty results")
         except Exception as e:
-            print(f"❌ Strategy 1 (batch) failed: {e}")
-        
-        # STRATEGY 2: Fallback to sequential processing
-        print("🔄 Strategy 2: Sequential processing fallback")
-        try:
-            results = await self._fallback_sequential_analysis(frames)
-            if results and len(results) > 0:
-                print(f"✅ Sequential processing successful: {len(results)} results")
-                return results
-        except Exception as e:
-            print(f"❌ Strategy 2 (sequential) failed: {e}")
+            print(f"❌ Strategies 1-2 (batch) failed: {e}")
         
         # STRATEGY 3: Last resort - create minimal results
         print("🆘 Strategy 3: Creating minimal fallback results")
@@ -266,7 +267,7 @@ Return valid JSON only, no other text."""
             fallback_results.append({
                 "timestamp": frame["timestamp"],
                 "frame_number": frame["number"],
-                "path": frame["path"],
+                "path": frame.get("path"),
                 "description": "Frame analysis unavailable - GPT-4o Vision processing failed",
                 "scene_type": "other",
                 "has_people": False,
@@ -278,6 +279,16 @@ Return valid JSON only, no other text."""
         print(f"⚠️ Using minimal fallback: {len(fallback_results)} results")
         return fallback_results
     
+    async def _analyze_batch_with_fallback(self, batch: List[Dict[str, Any]], index: int, total: int) -> List[Dict[str, Any]]:
+        """Analyze one batch under the concurrency limit, falling back to per-frame analysis if it fails"""
+        async with self.batch_slots:
+            print(f"🔍 Processing batch {index + 1}/{total}")
+            results = await self._analyze_single_batch(batch)
+            if not results:
+                print(f"⚠️ Batch {index + 1} failed, analyzing its frames one by one...")
+                results = await self._fallback_sequential_analysis(batch)
+        return results
+    
     async def _fallback_sequential_analysis(self, frames: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Fallback to sequential analysis if batch processing fails"""
         print(f"🔄 Falling back to sequential analysis for {len(frames)} frames...")
@@ -289,10 +300,9 @@ Return valid JSON only, no other text."""
                 print(f"🔍 Analyzing frame {i+1}/{min(len(frames), 8)} sequentially...")
                 
                 # Simple individual frame analysis
-                with open(frame["path"], "rb") as image_file:
-                    base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+                base64_image = frame_base64(frame)
                 
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=[
                         {
@@ -305,7 +315,7 @@ Return valid JSON only, no other text."""
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/jpeg;base64,{base64_image}",
+                                        "url": f"data:{frame.get('mime_type', 'image/jpeg')};base64,{base64_image}",
                                         "detail": "low"
                                     }
                                 }
@@ -328,7 +338,7 @@ Return valid JSON only, no other text."""
                         result = json.loads(content)
                         result["timestamp"] = frame["timestamp"]
                         result["frame_number"] = frame["number"]
-                        result["path"] = frame["path"]
+                        result["path"] = frame.get("path")
                         result["analyzer"] = "gpt-4o-vision-sequential"
                         results.append(result)
                         print(f"✅ Frame {i+1} analyzed: {result.get('description', 'N/A')[:50]}...")
@@ -337,7 +347,7 @@ Return valid JSON only, no other text."""
                         results.append({
                             "timestamp": frame["timestamp"],
                             "frame_number": frame["number"],
-                            "path": frame["path"],
+                            "path": frame.get("path"),
                             "description": content[:100],
                             "scene_type": "other",
                             "has_people": False,
@@ -376,9 +386,19 @@ class GeminiFlashVisionAnalyzer:
             self.model = None
             self.enabled = False
     
-    async def analyze(self, frame_path: str, timestamp: float, frame_number: int) -> Dict[str, Any]:
+    async def analyze(
+        self,
+        frame_path: Optional[str],
+        timestamp: float,
+        frame_number: int,
+        frame_data: Optional[bytes] = None,
+        prepared_mime_type: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Ultra-fast frame analysis - minimal processing
+        Ultra-fast frame analysis - minimal processing (frame_data is used instead of frame_path when given)
+        
+        prepared_mime_type marks frame_data as already resized by FramePreprocessor; it
+        is then sent as-is instead of being decoded and thumbnailed here.
         """
         if not self.enabled:
             return {
@@ -388,15 +408,19 @@ class GeminiFlashVisionAnalyzer:
             }
         
         try:
-            # Load and resize image aggressively for speed
-            from PIL import Image
-            img = Image.open(frame_path)
-            img.thumbnail((256, 256))  # Very small for speed
+            if prepared_mime_type and frame_data is not None:
+                img = {"mime_type": prepared_mime_type, "data": frame_data}
+            else:
+                # Load and resize image aggressively for speed
+                from PIL import Image
+                import io
+                img = Image.open(io.BytesIO(frame_data) if frame_data is not None else frame_path)
+                img.thumbnail((256, 256))  # Very small for speed
             
             # Minimal prompt for maximum speed
             prompt = """Return JSON only: {"scene": "presentation|meeting|screen|other", "has_text": true/false, "objects": ["person", "screen", "text"]}"""
             
-            response = self.model.generate_content(
+            response = await self.model.generate_content_async(
                 [prompt, img],
                 generation_config=genai.types.GenerationConfig(
                     temperature=0,
@@ -450,7 +474,13 @@ class GeminiFlashVisionAnalyzer:
         
         results = []
         for frame in frames:
-            result = await self.analyze(frame["path"], frame["timestamp"], frame["number"])
+            if frame.get("base64"):
+                result = await self.analyze(
+                    frame.get("path"), frame["timestamp"], frame["number"],
+                    base64.b64decode(frame["base64"]), frame.get("mime_type", "image/jpeg")
+                )
+            else:
+                result = await self.analyze(frame.get("path"), frame["timestamp"], frame["number"], frame.get("data"))
             results.append(result)
         
         return results
@@ -463,8 +493,8 @@ class HybridVisionAnalyzer:
     - Gemini Flash for all frames (fast OCR, scene detection)
     """
     
-    def __init__(self, openai_key: str, gemini_key: str):
-        self.gpt4o = GPT4oVisionAnalyzer(openai_key)
+    def __init__(self, openai_key: str, gemini_key: str, max_concurrent_batches: int = 4):
+        self.gpt4o = GPT4oVisionAnalyzer(openai_key, max_concurrent_batches=max_concurrent_batches)
         self.gemini = GeminiFlashVisionAnalyzer(gemini_key)
     
     async def analyze_video_frames(